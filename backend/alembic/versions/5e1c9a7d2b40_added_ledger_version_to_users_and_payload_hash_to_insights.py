@@ -0,0 +1,70 @@
+"""Added ledger_version to users (bumped by ledger triggers) and payload_hash to insights
+
+Revision ID: 5e1c9a7d2b40
+Revises: 3850c001f470
+Create Date: 2026-10-19 13:40:12.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1c9a7d2b40'
+down_revision: Union[str, Sequence[str], None] = '3850c001f470'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+LEDGER_TABLES = ['expenses', 'income', 'recurrence_series']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('ledger_version', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+    op.add_column('insights', sa.Column('payload_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_insights_payload_hash'), 'insights', ['payload_hash'], unique=False)
+
+    # statement level triggers, so bulk writes bump each touched user once
+    op.execute(
+        sa.text("""
+            CREATE OR REPLACE FUNCTION bump_ledger_version() RETURNS trigger AS $$
+            BEGIN
+                UPDATE users SET ledger_version = ledger_version + 1
+                WHERE user_id IN (SELECT DISTINCT user_id FROM changed_rows);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+    )
+
+    for table in LEDGER_TABLES:
+        op.execute(sa.text(f"""
+            CREATE TRIGGER {table}_ledger_version_ins AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_ledger_version();
+        """))
+        op.execute(sa.text(f"""
+            CREATE TRIGGER {table}_ledger_version_upd AFTER UPDATE ON {table}
+            REFERENCING NEW TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_ledger_version();
+        """))
+        op.execute(sa.text(f"""
+            CREATE TRIGGER {table}_ledger_version_del AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_ledger_version();
+        """))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in LEDGER_TABLES:
+        for suffix in ('ins', 'upd', 'del'):
+            op.execute(sa.text(f"DROP TRIGGER IF EXISTS {table}_ledger_version_{suffix} ON {table};"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS bump_ledger_version();"))
+
+    op.drop_index(op.f('ix_insights_payload_hash'), table_name='insights')
+    op.drop_column('insights', 'payload_hash')
+    op.drop_column('users', 'ledger_version')
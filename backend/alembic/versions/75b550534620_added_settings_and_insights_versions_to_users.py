@@ -0,0 +1,60 @@
+"""Added settings_version and insights_version to users, bumped by triggers like ledger_version
+
+Revision ID: 75b550534620
+Revises: 892e02958f35
+Create Date: 2026-10-19 18:02:44.519203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '75b550534620'
+down_revision: Union[str, Sequence[str], None] = '892e02958f35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# version column -> tables whose writes bump it
+VERSIONED_TABLES = {
+    'settings_version': ['user_insight_prefs'],
+    'insights_version': ['insights', 'forecasts'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column, tables in VERSIONED_TABLES.items():
+        op.add_column('users', sa.Column(column, sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+
+        # statement level, same as bump_ledger_version
+        op.execute(sa.text(f"""
+            CREATE OR REPLACE FUNCTION bump_{column}() RETURNS trigger AS $$
+            BEGIN
+                UPDATE users SET {column} = {column} + 1
+                WHERE user_id IN (SELECT DISTINCT user_id FROM changed_rows);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """))
+
+        for table in tables:
+            for suffix, event, transition in (('ins', 'INSERT', 'NEW'), ('upd', 'UPDATE', 'NEW'), ('del', 'DELETE', 'OLD')):
+                op.execute(sa.text(f"""
+                    CREATE TRIGGER {table}_{column}_{suffix} AFTER {event} ON {table}
+                    REFERENCING {transition} TABLE AS changed_rows
+                    FOR EACH STATEMENT EXECUTE FUNCTION bump_{column}();
+                """))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column, tables in VERSIONED_TABLES.items():
+        for table in tables:
+            for suffix in ('ins', 'upd', 'del'):
+                op.execute(sa.text(f"DROP TRIGGER IF EXISTS {table}_{column}_{suffix} ON {table};"))
+        op.execute(sa.text(f"DROP FUNCTION IF EXISTS bump_{column}();"))
+        op.drop_column('users', column)
@@ -0,0 +1,130 @@
+"""Added currencies and expense_categories dimension tables, ledger and fx_rates reference them by small int id
+
+Revision ID: 892e02958f35
+Revises: c146a5e8e8c2
+Create Date: 2026-10-19 17:21:08.403316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '892e02958f35'
+down_revision: Union[str, Sequence[str], None] = 'c146a5e8e8c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, code column, id column)
+CURRENCY_COLUMNS = [
+    ('expenses', 'currency', 'currency_id'),
+    ('income', 'currency', 'currency_id'),
+    ('fx_rates', 'original_currency', 'original_currency_id'),
+    ('fx_rates', 'to_currency', 'to_currency_id'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('currencies',
+    sa.Column('currency_id', sa.SmallInteger(), nullable=False),
+    sa.Column('code', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('currency_id'),
+    sa.UniqueConstraint('code')
+    )
+    op.create_table('expense_categories',
+    sa.Column('category_id', sa.SmallInteger(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('category_id'),
+    sa.UniqueConstraint('name')
+    )
+
+    # every code in use, users.preferred_currency included so the map knows them up front
+    op.execute(sa.text("""
+        INSERT INTO currencies (code)
+        SELECT DISTINCT upper(trim(code)) FROM (
+            SELECT currency AS code FROM expenses
+            UNION SELECT currency FROM income
+            UNION SELECT original_currency FROM fx_rates
+            UNION SELECT to_currency FROM fx_rates
+            UNION SELECT preferred_currency FROM users
+        ) codes
+        ORDER BY 1;
+    """))
+    op.execute(sa.text(
+        "INSERT INTO expense_categories (name) SELECT DISTINCT trim(expense_category) FROM expenses ORDER BY 1;"
+    ))
+
+    for table, _, id_column in CURRENCY_COLUMNS:
+        op.add_column(table, sa.Column(id_column, sa.SmallInteger(), nullable=True))
+    op.add_column('expenses', sa.Column('category_id', sa.SmallInteger(), nullable=True))
+
+    # one pass per table, the ledger triggers bump each user's ledger_version once
+    op.execute(sa.text("""
+        UPDATE expenses e SET currency_id = c.currency_id, category_id = k.category_id
+        FROM currencies c, expense_categories k
+        WHERE c.code = upper(trim(e.currency)) AND k.name = trim(e.expense_category);
+    """))
+    op.execute(sa.text("""
+        UPDATE income i SET currency_id = c.currency_id
+        FROM currencies c
+        WHERE c.code = upper(trim(i.currency));
+    """))
+    op.execute(sa.text("""
+        UPDATE fx_rates f SET original_currency_id = o.currency_id, to_currency_id = t.currency_id
+        FROM currencies o, currencies t
+        WHERE o.code = upper(trim(f.original_currency)) AND t.code = upper(trim(f.to_currency));
+    """))
+
+    op.drop_constraint('uq_fx_rates_rate_date', 'fx_rates', type_='unique')
+    for table, code_column, id_column in CURRENCY_COLUMNS:
+        op.alter_column(table, id_column, nullable=False)
+        op.create_foreign_key(f'{table}_{id_column}_fkey', table, 'currencies', [id_column], ['currency_id'])
+        op.drop_column(table, code_column)
+    op.alter_column('expenses', 'category_id', nullable=False)
+    op.create_foreign_key('expenses_category_id_fkey', 'expenses', 'expense_categories', ['category_id'], ['category_id'])
+    op.drop_column('expenses', 'expense_category')
+
+    op.create_unique_constraint(
+        'uq_fx_rates_rate_date', 'fx_rates', ['original_currency_id', 'to_currency_id', 'rate_date']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, code_column, _ in CURRENCY_COLUMNS:
+        op.add_column(table, sa.Column(code_column, sa.String(length=100), nullable=True))
+    op.add_column('expenses', sa.Column('expense_category', sa.String(length=255), nullable=True))
+
+    op.execute(sa.text("""
+        UPDATE expenses e SET currency = c.code, expense_category = k.name
+        FROM currencies c, expense_categories k
+        WHERE c.currency_id = e.currency_id AND k.category_id = e.category_id;
+    """))
+    op.execute(sa.text("""
+        UPDATE income i SET currency = c.code
+        FROM currencies c
+        WHERE c.currency_id = i.currency_id;
+    """))
+    op.execute(sa.text("""
+        UPDATE fx_rates f SET original_currency = o.code, to_currency = t.code
+        FROM currencies o, currencies t
+        WHERE o.currency_id = f.original_currency_id AND t.currency_id = f.to_currency_id;
+    """))
+
+    op.drop_constraint('uq_fx_rates_rate_date', 'fx_rates', type_='unique')
+    for table, code_column, id_column in CURRENCY_COLUMNS:
+        op.alter_column(table, code_column, nullable=False)
+        op.drop_constraint(f'{table}_{id_column}_fkey', table, type_='foreignkey')
+        op.drop_column(table, id_column)
+    op.alter_column('expenses', 'expense_category', nullable=False)
+    op.drop_constraint('expenses_category_id_fkey', 'expenses', type_='foreignkey')
+    op.drop_column('expenses', 'category_id')
+
+    op.create_unique_constraint('uq_fx_rates_rate_date', 'fx_rates', ['original_currency', 'to_currency', 'rate_date'])
+
+    op.drop_table('expense_categories')
+    op.drop_table('currencies')
@@ -0,0 +1,155 @@
+"""Partitioned expenses and income by month on date, with a default partition
+
+Revision ID: c146a5e8e8c2
+Revises: f20a8c4d6e13
+Create Date: 2026-10-19 16:05:37.214690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c146a5e8e8c2'
+down_revision: Union[str, Sequence[str], None] = 'f20a8c4d6e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table -> (id column, unique constraint)
+LEDGER_TABLES = {
+    'expenses': ('expense_id', 'uq_expense_series_date'),
+    'income': ('income_id', 'uq_income_series_date'),
+}
+HISTORY_YEARS = 10          # older rows stay in the default partition
+MONTHS_AHEAD = 3
+
+
+# creates the missing monthly partitions of parent between two months, rows of
+# those months already in the default partition are moved into them
+ENSURE_PARTITIONS_FUNCTION = """
+    CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent text, from_month date, to_month date)
+    RETURNS integer AS $$
+    DECLARE
+        month_start date := date_trunc('month', from_month)::date;
+        month_end date;
+        partition_name text;
+        created integer := 0;
+    BEGIN
+        WHILE month_start <= to_month LOOP
+            month_end := (month_start + interval '1 month')::date;
+            partition_name := format('%s_%s', parent, to_char(month_start, 'YYYY_MM'));
+
+            IF to_regclass(partition_name) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name, parent);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I WHERE date >= %L AND date < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                    parent || '_default', month_start, month_end, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    parent, partition_name, month_start, month_end
+                );
+                created := created + 1;
+            END IF;
+
+            month_start := month_end;
+        END LOOP;
+        RETURN created;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+def _create_ledger_triggers(table: str) -> None:
+    # same statement level triggers as 5e1c9a7d2b40, on the new table
+    for suffix, event, transition in (('ins', 'INSERT', 'NEW'), ('upd', 'UPDATE', 'NEW'), ('del', 'DELETE', 'OLD')):
+        op.execute(sa.text(f"""
+            CREATE TRIGGER {table}_ledger_version_{suffix} AFTER {event} ON {table}
+            REFERENCING {transition} TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_ledger_version();
+        """))
+
+
+def _drop_ledger_triggers(table: str) -> None:
+    for suffix in ('ins', 'upd', 'del'):
+        op.execute(sa.text(f"DROP TRIGGER IF EXISTS {table}_ledger_version_{suffix} ON {table};"))
+
+
+def _rename_out_of_the_way(table: str, id_column: str, unique_name: str, new_name: str) -> None:
+    # index backed names are unique per schema, free them for the replacement table
+    op.execute(sa.text(f"ALTER TABLE {table} RENAME TO {new_name};"))
+    op.execute(sa.text(f"ALTER TABLE {new_name} RENAME CONSTRAINT {table}_pkey TO {new_name}_pkey;"))
+    op.execute(sa.text(f"ALTER TABLE {new_name} RENAME CONSTRAINT {unique_name} TO {unique_name}_{new_name};"))
+    op.execute(sa.text(f"ALTER INDEX ix_{table}_{id_column} RENAME TO ix_{new_name}_{id_column};"))
+    op.execute(sa.text(f"ALTER INDEX ix_{table}_recurrence_series_id RENAME TO ix_{new_name}_recurrence_series_id;"))
+
+
+def _add_keys(table: str, id_column: str, unique_name: str, primary_key: str) -> None:
+    op.execute(sa.text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key});"))
+    op.execute(sa.text(f"ALTER TABLE {table} ADD CONSTRAINT {unique_name} UNIQUE (user_id, recurrence_series_id, date);"))
+    op.execute(sa.text(
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_user_id_fkey FOREIGN KEY (user_id) "
+        f"REFERENCES users (user_id) ON DELETE CASCADE;"
+    ))
+    op.execute(sa.text(
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_recurrence_series_id_fkey FOREIGN KEY (recurrence_series_id) "
+        f"REFERENCES recurrence_series (series_id) ON DELETE SET NULL;"
+    ))
+    op.create_index(f'ix_{table}_{id_column}', table, [id_column], unique=False)
+    op.create_index(f'ix_{table}_recurrence_series_id', table, ['recurrence_series_id'], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.text(ENSURE_PARTITIONS_FUNCTION))
+
+    for table, (id_column, unique_name) in LEDGER_TABLES.items():
+        old = f"{table}_unpartitioned"
+        _drop_ledger_triggers(table)
+        _rename_out_of_the_way(table, id_column, unique_name, old)
+
+        op.execute(sa.text(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (date);"
+        ))
+        op.execute(sa.text(f"ALTER SEQUENCE {table}_{id_column}_seq OWNED BY {table}.{id_column};"))     # survives dropping the old table
+        _add_keys(table, id_column, unique_name, f"{id_column}, date")       # the partition key has to be part of the primary key
+        op.create_index(f'ix_{table}_user_id_date', table, ['user_id', 'date'], unique=False)
+
+        # partitions exist before the copy, so rows go straight to their month
+        op.execute(sa.text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;"))
+        op.execute(sa.text(f"""
+            SELECT ensure_monthly_partitions(
+                '{table}',
+                GREATEST(COALESCE(MIN(date), CURRENT_DATE), (CURRENT_DATE - interval '{HISTORY_YEARS} years')::date),
+                (CURRENT_DATE + interval '{MONTHS_AHEAD} months')::date
+            )
+            FROM {old};
+        """))
+        op.execute(sa.text(f"INSERT INTO {table} SELECT * FROM {old};"))
+        op.execute(sa.text(f"DROP TABLE {old};"))
+
+        _create_ledger_triggers(table)
+        op.execute(sa.text(f"ANALYZE {table};"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # detached partitions are standalone tables by then and are not copied back
+    for table, (id_column, unique_name) in LEDGER_TABLES.items():
+        partitioned = f"{table}_partitioned"
+        _drop_ledger_triggers(table)
+        op.drop_index(f'ix_{table}_user_id_date', table_name=table)
+        _rename_out_of_the_way(table, id_column, unique_name, partitioned)
+
+        op.execute(sa.text(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS INCLUDING CONSTRAINTS);"))
+        op.execute(sa.text(f"ALTER SEQUENCE {table}_{id_column}_seq OWNED BY {table}.{id_column};"))
+        op.execute(sa.text(f"INSERT INTO {table} SELECT * FROM {partitioned};"))
+        op.execute(sa.text(f"DROP TABLE {partitioned};"))          # drops its partitions too
+        _add_keys(table, id_column, unique_name, id_column)
+
+        _create_ledger_triggers(table)
+
+    op.execute(sa.text("DROP FUNCTION IF EXISTS ensure_monthly_partitions(text, date, date);"))
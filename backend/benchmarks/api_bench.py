@@ -0,0 +1,292 @@
+"""
+Latency / throughput benchmark for the API hot paths
+
+Boots the FastAPI app in process (lifespan included) and drives it through
+httpx's ASGI transport, with the ExchangeRate API and SendGrid stubbed out.
+Uses the database in BENCH_DB_URL (a migrated Postgres) when set, otherwise
+a throwaway SQLite file.
+
+Run from the backend folder:
+    python -m benchmarks.api_bench --requests 500 --concurrency 16 --out baseline.json
+    python -m benchmarks.api_bench --compare baseline.json
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+BENCH_CLASSES = [("GAS_PRICES", "Gas Prices"), ("RENT_PRICES", "Rent Prices"), ("LOCAL_UPDATES", "Local Updates")]
+STUB_RATES = {"USD": 1.0, "AED": 3.6725, "EUR": 0.92, "GBP": 0.79, "INR": 83.2}
+
+
+def _configure_env(db_url: str) -> None:
+    # app modules read their config at import time, so this has to run before importing them
+    os.environ["DB_URL"] = db_url
+    os.environ["REPLICA_DB_URL"] = ""
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("OTP_SECRET_KEY", "bench-otp-secret")
+    os.environ.setdefault("FX_API_BASE_URL", "http://fx.stub/v6")
+    os.environ.setdefault("FX_API_KEY", "bench")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def _register_sqlite_shims() -> None:
+    from sqlalchemy import SmallInteger
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(JSONB, "sqlite")
+    def _jsonb_as_json(type_, compiler, **kw):
+        return "JSON"
+
+    # only an INTEGER primary key autoincrements in sqlite, the dimension tables key on SMALLINT
+    @compiles(SmallInteger, "sqlite")
+    def _smallint_as_integer(type_, compiler, **kw):
+        return "INTEGER"
+
+
+def _fx_stub(latency: float):
+    import httpx
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        parts = request.url.path.strip("/").split("/")
+        if "pair" in parts:
+            base, target = parts[-2], parts[-1]
+            return httpx.Response(200, json={
+                "result": "success",
+                "time_last_update_unix": int(time.time()),
+                "base_code": base,
+                "target_code": target,
+                "conversion_rate": round(STUB_RATES[target] / STUB_RATES[base], 6),
+            })
+        if parts[-1] == "codes":
+            return httpx.Response(200, json={
+                "result": "success",
+                "supported_codes": [[code, code] for code in STUB_RATES],
+            })
+        return httpx.Response(404, json={"result": "error", "error-type": "unsupported-code"})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=10.0)
+
+
+class _StubSendGrid():
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def send(self, message):
+        return type("StubResponse", (), {"status_code": 202})()
+
+
+def _seed() -> None:
+    from database import SessionLocal
+    from models.core.user import User
+    from models.core.insight_class import InsightClass
+    from utils.security import hash_password
+
+    db = SessionLocal()
+    try:
+        if db.query(User).filter(User.email == BENCH_EMAIL).first() is None:
+            db.add(User(
+                email=BENCH_EMAIL,
+                password=hash_password(BENCH_PASSWORD),
+                name="Bench",
+                country="United Arab Emirates",
+                city="Dubai",
+                preferred_currency="AED",
+                is_verified=True
+            ))
+        existing = {key for (key,) in db.query(InsightClass.key).all()}
+        for key, name in BENCH_CLASSES:
+            if key not in existing:
+                db.add(InsightClass(key=key, name=name))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    # nearest rank
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def _drive(send: Callable, total: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await send()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+    }
+
+
+def _scenarios(client, token: str) -> Dict[str, Callable]:
+    auth = {"Authorization": f"Bearer {token}"}
+    return {
+        "auth_login": lambda: client.post("/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD}),
+        "fx_exchange_rate": lambda: client.get(
+            "/fx/exchange-rate", params={"from_currency": "USD", "to_currency": "AED"}, headers=auth
+        ),
+        "fx_convert_amount": lambda: client.get(
+            "/fx/convert-amount", params={"from_currency": "USD", "to_currency": "AED", "amount": "125.50"}, headers=auth
+        ),
+        "settings_user_insight_prefs": lambda: client.get("/settings/user-insight-prefs", headers=auth),
+        "insight_classes": lambda: client.get("/insight-classes/", headers=auth),
+        "ledger_net_balance": lambda: client.get("/ledger/net-balance", headers=auth),
+    }
+
+
+async def run(
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    only: Optional[List[str]] = None,
+    fx_latency: float = 0.0
+) -> dict:
+    import httpx
+    import services.email_service as email_service
+    from database import Base, engine
+    from main import app
+    from services.fx_service import fx_service
+
+    if engine.dialect.name == "sqlite":
+        # the partitioned ledger tables key on (id, date), sqlite only autoincrements a lone integer key.
+        # No benchmark scenario inserts ledger rows
+        for table in ("expenses", "income"):
+            for column in Base.metadata.tables[table].primary_key.columns:
+                column.autoincrement = False
+        Base.metadata.create_all(engine)
+    _seed()
+
+    fx_service.open(_fx_stub(fx_latency))
+    email_service.get_sendgrid_client = _StubSendGrid
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            login = await client.post("/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+            login.raise_for_status()
+            scenarios = _scenarios(client, login.json()["access_token"])
+
+            for name, send in scenarios.items():
+                if only and name not in only:
+                    continue
+                await _drive(send, warmup, concurrency)
+                results[name] = await _drive(send, requests, concurrency)
+                print(f"{name}: {results[name]}", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": int(time.time()),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "database": engine.dialect.name,
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "fx_latency_ms": fx_latency * 1000,
+        },
+        "results": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """
+    Returns the endpoints whose p95 latency or throughput regressed by more than threshold (a fraction)
+    """
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        p95_change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        rps_change = (now["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] if before["throughput_rps"] else 0.0
+        print(f"{name}: p95 {before['p95_ms']} -> {now['p95_ms']} ms ({p95_change:+.1%}), "
+              f"throughput {before['throughput_rps']} -> {now['throughput_rps']} rps ({rps_change:+.1%})", file=sys.stderr)
+        if p95_change > threshold or rps_change < -threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API hot paths")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--endpoint", action="append", dest="endpoints", help="only run this scenario, repeatable")
+    parser.add_argument("--db-url", default=os.getenv("BENCH_DB_URL"), help="defaults to BENCH_DB_URL, else a temp SQLite file")
+    parser.add_argument("--fx-latency-ms", type=float, default=0.0, help="latency of the stubbed ExchangeRate API")
+    parser.add_argument("--out", default=None, help="write the JSON results to this file")
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed regression before failing, as a fraction")
+    args = parser.parse_args()
+
+    db_url = args.db_url
+    if not db_url:
+        db_url = f"sqlite:///{Path(tempfile.mkdtemp(prefix='cashvise-bench-')) / 'bench.db'}"
+        _register_sqlite_shims()
+    _configure_env(db_url)
+
+    result = asyncio.run(run(args.requests, args.concurrency, args.warmup, args.endpoints, args.fx_latency_ms / 1000))
+
+    output = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(baseline, result, args.threshold)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,500 @@
+"""
+Synthetic dataset for load testing the ledger, insight and forecast paths
+
+Fills users, fx_rates, billing_customers, subscriptions, recurrence_series,
+expenses, income, insights and forecasts with realistic looking data:
+lognormal amounts per category, a mix of currencies with daily random walk
+rates, heavy and light users, monthly and daily recurring series.
+Rows are streamed with COPY in chunks, ledger rows from several worker
+processes at once. Postgres only, point BENCH_DB_URL (or --db-url) at a
+migrated database that is not production.
+
+Run from the backend folder:
+    python -m benchmarks.generate_data --users 10000 --days 730 --workers 4
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+import argparse
+import calendar
+import csv
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+
+SERIES_PER_USER = 8         # series id block reserved per user, keeps ids unique across workers
+USER_SLICE = 250            # users per worker task
+BENCH_PASSWORD = "bench-password"
+
+# USD -> currency starting rate and daily volatility
+CURRENCIES = {
+    "USD": (1.0, 0.0),
+    "EUR": (0.92, 0.004),
+    "GBP": (0.79, 0.004),
+    "AED": (3.6725, 0.0001),
+    "INR": (83.2, 0.003),
+    "CAD": (1.36, 0.004),
+    "AUD": (1.52, 0.005),
+    "JPY": (150.0, 0.005),
+    "SGD": (1.34, 0.003),
+    "CHF": (0.88, 0.004),
+}
+
+# (country, city, currency, weight)
+LOCALES = [
+    ("United States", "New York", "USD", 20),
+    ("United States", "Austin", "USD", 10),
+    ("United Kingdom", "London", "GBP", 10),
+    ("Germany", "Berlin", "EUR", 8),
+    ("France", "Paris", "EUR", 6),
+    ("United Arab Emirates", "Dubai", "AED", 12),
+    ("India", "Bangalore", "INR", 12),
+    ("Canada", "Toronto", "CAD", 6),
+    ("Australia", "Sydney", "AUD", 6),
+    ("Japan", "Tokyo", "JPY", 4),
+    ("Singapore", "Singapore", "SGD", 3),
+    ("Switzerland", "Zurich", "CHF", 3),
+]
+
+# (category, weight, lognormal mu and sigma of the USD amount)
+EXPENSE_CATEGORIES = [
+    ("Groceries", 25, math.log(40), 0.6),
+    ("Dining", 20, math.log(25), 0.7),
+    ("Transport", 15, math.log(12), 0.8),
+    ("Shopping", 12, math.log(60), 1.0),
+    ("Entertainment", 8, math.log(30), 0.8),
+    ("Other", 7, math.log(20), 1.0),
+    ("Utilities", 4, math.log(90), 0.4),
+    ("Health", 4, math.log(70), 1.0),
+    ("Travel", 3, math.log(300), 1.0),
+    ("Education", 2, math.log(150), 0.9),
+]
+
+SERIES_EXPENSE_CATEGORIES = ["Rent", "Subscriptions", "Transport"]     # categories of the recurring expense series
+
+SUBSCRIPTION_STATUSES = [("ACTIVE", 50), ("TRIAL", 10), ("CANCELLED", 25), ("EXPIRED", 15)]
+
+USER_COLUMNS = ["user_id", "email", "password", "name", "country", "city", "preferred_currency", "is_verified"]
+FX_COLUMNS = ["original_currency_id", "to_currency_id", "rate", "rate_date"]
+CUSTOMER_COLUMNS = ["id", "user_id", "stripe_customer_id"]
+SUBSCRIPTION_COLUMNS = [
+    "id", "user_id", "billing_customer_id", "stripe_subscription_id", "stripe_price_id", "stripe_item_id",
+    "status", "current_period_start", "current_period_end", "cancelled_at", "trial_start", "trial_end", "stripe_event_ts"
+]
+SERIES_COLUMNS = ["series_id", "user_id", "series_type", "frequency", "bulk", "start_date", "end_date", "is_active"]
+EXPENSE_COLUMNS = [
+    "user_id", "date", "category_id", "currency_id", "original_amount", "usd_amount",
+    "fx_rate_to_usd", "fx_date", "recurrence_series_id"
+]
+INCOME_COLUMNS = [
+    "user_id", "date", "source", "currency_id", "original_amount", "usd_amount",
+    "fx_rate_to_usd", "fx_date", "recurrence_series_id"
+]
+INSIGHT_COLUMNS = ["user_id", "insight_class_id", "generated_on", "raw_tool_payload", "llm_insights"]
+FORECAST_COLUMNS = ["user_id", "generated_on", "forecast"]
+
+
+class _Params():
+    def __init__(self, args: argparse.Namespace, start: date, first_user_id: int, series_base: int, class_ids: List[int]):
+        self.db_url = args.db_url
+        self.seed = args.seed
+        self.days = args.days
+        self.start = start
+        self.expenses_per_day = args.expenses_per_day
+        self.insights_per_user = args.insights_per_user
+        self.forecasts_per_user = args.forecasts_per_user
+        self.chunk_rows = args.chunk_rows
+        self.first_user_id = first_user_id
+        self.series_base = series_base
+        self.class_ids = class_ids
+        self.currency_ids: Dict[str, int] = {}         # dimension ids, filled in before the ledger is generated
+        self.category_ids: Dict[str, int] = {}
+
+
+def _connect(db_url: str):
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import NullPool
+
+    engine = create_engine(db_url, poolclass=NullPool)
+    return engine.raw_connection().driver_connection
+
+
+def _copy(conn, table: str, columns: Sequence[str], rows: Iterable[Sequence], chunk_rows: int) -> int:
+    """
+    Streams rows into the table with COPY ... FROM STDIN, committing every chunk_rows rows
+
+    Returns:
+    - number of rows copied
+    """
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+
+    def flush():
+        buffer.seek(0)
+        with conn.cursor() as cur:
+            cur.copy_expert(sql, buffer)
+        conn.commit()
+        buffer.seek(0)
+        buffer.truncate()
+
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            flush()
+            total += pending
+            pending = 0
+    if pending:
+        flush()
+        total += pending
+    return total
+
+
+def _poisson(rng: random.Random, lam: float) -> int:
+    # Knuth, fine for the small rates used here
+    limit, k, p = math.exp(-lam), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def build_fx_table(seed: int, start: date, days: int) -> Dict[str, List[float]]:
+    """
+    Daily USD -> currency rates as a random walk per currency
+    """
+    rng = random.Random(seed)
+    table = {}
+    for currency, (rate, volatility) in CURRENCIES.items():
+        rates = []
+        for _ in range(days):
+            rates.append(rate)
+            rate *= math.exp(rng.gauss(0, volatility))
+        table[currency] = rates
+    return table
+
+
+def _fx_rows(fx: Dict[str, List[float]], start: date, currency_ids: Dict[str, int]) -> Iterator[tuple]:
+    usd = currency_ids["USD"]
+    for currency, rates in fx.items():
+        if currency == "USD":
+            continue
+        for day, rate in enumerate(rates):
+            rate_date = start + timedelta(days=day)
+            yield (usd, currency_ids[currency], f"{rate:.8f}", rate_date)
+            yield (currency_ids[currency], usd, f"{1 / rate:.8f}", rate_date)
+
+
+def _user_profile(seed: int, user_id: int) -> Tuple[random.Random, tuple, float]:
+    rng = random.Random(seed * 1_000_003 + user_id)
+    locale = rng.choices(LOCALES, weights=[l[3] for l in LOCALES])[0]
+    activity = rng.lognormvariate(0, 0.6)         # a few heavy users, many light ones
+    return rng, locale, activity
+
+
+def _user_rows(params: _Params, user_count: int, password_hash: str) -> Iterator[tuple]:
+    for user_id in range(params.first_user_id, params.first_user_id + user_count):
+        rng, (country, city, currency, _), _ = _user_profile(params.seed, user_id)
+        yield (
+            user_id, f"synth{user_id}@example.com", password_hash, f"Synthetic User {user_id}",
+            country, city, currency, "t" if rng.random() < 0.95 else "f"
+        )
+
+
+def _billing_rows(params: _Params, user_count: int, customer_base: int, subscription_base: int):
+    customers, subscriptions = [], []
+    now = datetime.now(timezone.utc)
+    rng = random.Random(params.seed + 17)
+    statuses = [s for s, _ in SUBSCRIPTION_STATUSES]
+    weights = [w for _, w in SUBSCRIPTION_STATUSES]
+
+    for offset in range(user_count):
+        if rng.random() > 0.7:
+            continue
+        user_id = params.first_user_id + offset
+        customer_id = customer_base + len(customers)
+        customers.append((customer_id, user_id, f"cus_synth_{user_id}"))
+
+        status = rng.choices(statuses, weights=weights)[0]
+        if status in ("ACTIVE", "TRIAL"):
+            period_start = now - timedelta(days=rng.randint(0, 29), hours=rng.randint(0, 23))
+        else:
+            period_start = now - timedelta(days=rng.randint(31, 400))
+        period_end = period_start + timedelta(days=30)
+        trial_start = period_start if status == "TRIAL" else None
+        trial_end = period_start + timedelta(days=14) if status == "TRIAL" else None
+        cancelled_at = period_end - timedelta(days=rng.randint(1, 29)) if status == "CANCELLED" else None
+
+        subscriptions.append((
+            subscription_base + len(subscriptions), user_id, customer_id,
+            f"sub_synth_{user_id}", "price_synth_monthly", f"si_synth_{user_id}",
+            status, period_start.isoformat(), period_end.isoformat(),
+            cancelled_at.isoformat() if cancelled_at else None,
+            trial_start.isoformat() if trial_start else None,
+            trial_end.isoformat() if trial_end else None,
+            int(period_start.timestamp())
+        ))
+    return customers, subscriptions
+
+
+def _money(value: float) -> str:
+    return f"{value:.2f}"
+
+
+def _ledger_for_user(params: _Params, fx: Dict[str, List[float]], user_id: int, out: Dict[str, list]) -> None:
+    rng, (_, _, home_currency, _), activity = _user_profile(params.seed, user_id)
+    end = params.start + timedelta(days=params.days - 1)
+    series_id = params.series_base + (user_id - params.first_user_id) * SERIES_PER_USER
+    currencies = list(CURRENCIES)
+    categories = EXPENSE_CATEGORIES
+    category_weights = [c[1] for c in categories]
+
+    def amounts(usd: float, currency: str, day: int) -> tuple:
+        rate = fx[currency][day]
+        return params.currency_ids[currency], _money(usd * rate), _money(usd), f"{1 / rate:.8f}", params.start + timedelta(days=day)
+
+    # recurring series: monthly salary, monthly rent and subscriptions, a daily commute for some users
+    series = [("INCOME", "MONTHLY", "Salary", math.exp(rng.gauss(math.log(4500), 0.5)), rng.randint(1, 28))]
+    if rng.random() < 0.8:
+        series.append(("EXPENSE", "MONTHLY", "Rent", math.exp(rng.gauss(math.log(1400), 0.4)), rng.randint(1, 5)))
+    for _ in range(rng.randint(0, 3)):
+        series.append(("EXPENSE", "MONTHLY", "Subscriptions", rng.uniform(5, 25), rng.randint(1, 28)))
+    if rng.random() < 0.3:
+        series.append(("EXPENSE", "DAILY", "Transport", rng.uniform(3, 12), None))
+
+    for index, (series_type, frequency, label, usd, day_of_month) in enumerate(series):
+        sid = series_id + index
+        series_start = params.start + timedelta(days=rng.randint(0, params.days // 4))
+        series_end = None if rng.random() < 0.85 else series_start + timedelta(days=rng.randint(30, params.days))
+        out["recurrence_series"].append((
+            sid, user_id, series_type, frequency, "f", series_start,
+            series_end, "t" if series_end is None or series_end >= end else "f"
+        ))
+
+        last = min(series_end or end, end)
+        day = (series_start - params.start).days
+        current = series_start
+        while current <= last:
+            if frequency == "DAILY" or current.day == min(day_of_month, calendar.monthrange(current.year, current.month)[1]):
+                # expenses reference their category by id, income keeps the free text source
+                label_value = label if series_type == "INCOME" else params.category_ids[label]
+                row = (user_id, current, label_value) + amounts(usd, home_currency, day) + (sid,)
+                out["income" if series_type == "INCOME" else "expenses"].append(row)
+            current += timedelta(days=1)
+            day += 1
+
+    # ad hoc spending, mostly in the home currency with some travel spend in others
+    rate = params.expenses_per_day * activity
+    for day in range(params.days):
+        current = params.start + timedelta(days=day)
+        for _ in range(_poisson(rng, rate)):
+            category, _, mu, sigma = rng.choices(categories, weights=category_weights)[0]
+            currency = home_currency if rng.random() < 0.85 else rng.choice(currencies)
+            usd = max(0.5, rng.lognormvariate(mu, sigma))
+            out["expenses"].append((user_id, current, params.category_ids[category]) + amounts(usd, currency, day) + (None,))
+        if rng.random() < 0.01:
+            usd = rng.lognormvariate(math.log(600), 0.8)
+            out["income"].append((user_id, current, "Freelance") + amounts(usd, home_currency, day) + (None,))
+
+    # generated insights and forecasts spread over the last months
+    now = datetime.now(timezone.utc)
+    for _ in range(params.insights_per_user):
+        generated_on = now - timedelta(minutes=rng.randint(0, 180 * 24 * 60))
+        class_id = rng.choice(params.class_ids)
+        payload = {
+            "currency": home_currency,
+            "samples": [round(rng.lognormvariate(3, 0.5), 2) for _ in range(24)],
+            "window_days": 30,
+        }
+        llm = {"summary": f"Synthetic insight {class_id} for user {user_id}", "score": round(rng.random(), 3)}
+        out["insights"].append((user_id, class_id, generated_on.isoformat(), json.dumps(payload), json.dumps(llm)))
+
+    for _ in range(params.forecasts_per_user):
+        generated_on = now - timedelta(minutes=rng.randint(0, 180 * 24 * 60))
+        base = rng.lognormvariate(math.log(80), 0.5)
+        forecast = {
+            "currency": home_currency,
+            "daily": [round(base * rng.uniform(0.6, 1.4), 2) for _ in range(30)],
+        }
+        out["forecasts"].append((user_id, generated_on.isoformat(), json.dumps(forecast)))
+
+
+_worker_state: dict = {}
+
+
+def _init_worker(params: _Params, fx: Dict[str, List[float]]) -> None:
+    _worker_state["params"] = params
+    _worker_state["fx"] = fx
+    _worker_state["conn"] = _connect(params.db_url)
+
+
+def _load_user_slice(user_ids: Tuple[int, int]) -> Dict[str, int]:
+    params, fx, conn = _worker_state["params"], _worker_state["fx"], _worker_state["conn"]
+    out = {"recurrence_series": [], "expenses": [], "income": [], "insights": [], "forecasts": []}
+    for user_id in range(*user_ids):
+        _ledger_for_user(params, fx, user_id, out)
+
+    # series first, ledger rows reference them
+    return {
+        "recurrence_series": _copy(conn, "recurrence_series", SERIES_COLUMNS, out["recurrence_series"], params.chunk_rows),
+        "expenses": _copy(conn, "expenses", EXPENSE_COLUMNS, out["expenses"], params.chunk_rows),
+        "income": _copy(conn, "income", INCOME_COLUMNS, out["income"], params.chunk_rows),
+        "insights": _copy(conn, "insights", INSIGHT_COLUMNS, out["insights"], params.chunk_rows),
+        "forecasts": _copy(conn, "forecasts", FORECAST_COLUMNS, out["forecasts"], params.chunk_rows),
+    }
+
+
+def _max_id(conn, table: str, column: str) -> int:
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")
+        return cur.fetchone()[0]
+
+
+def _dimension_ids(conn, table: str, id_column: str, value_column: str, values: Sequence[str]) -> Dict[str, int]:
+    values = sorted(set(values))
+    with conn.cursor() as cur:
+        cur.execute(
+            f"INSERT INTO {table} ({value_column}) SELECT unnest(%s::text[]) ON CONFLICT ({value_column}) DO NOTHING",
+            (values,)
+        )
+        cur.execute(f"SELECT {value_column}, {id_column} FROM {table} WHERE {value_column} = ANY(%s)", (values,))
+        ids = dict(cur.fetchall())
+    conn.commit()
+    return ids
+
+
+def _load_fx(conn, fx: Dict[str, List[float]], start: date, currency_ids: Dict[str, int], chunk_rows: int) -> int:
+    # existing days win, so go through a temp table instead of copying straight in
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE fx_rates_load (LIKE fx_rates INCLUDING DEFAULTS) ON COMMIT PRESERVE ROWS")
+    conn.commit()
+    _copy(conn, "fx_rates_load", FX_COLUMNS, _fx_rows(fx, start, currency_ids), chunk_rows)
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO fx_rates (original_currency_id, to_currency_id, rate, rate_date) "
+            "SELECT original_currency_id, to_currency_id, rate, rate_date FROM fx_rates_load "
+            "ON CONFLICT ON CONSTRAINT uq_fx_rates_rate_date DO NOTHING"
+        )
+        inserted = cur.rowcount
+        cur.execute("DROP TABLE fx_rates_load")
+    conn.commit()
+    return inserted
+
+
+def generate(args: argparse.Namespace) -> dict:
+    """
+    Loads the synthetic dataset
+
+    Returns:
+    - rows loaded per table and timings
+    """
+    from utils.security import hash_password
+
+    started = time.perf_counter()
+    conn = _connect(args.db_url)
+    stats: Dict[str, int] = {}
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT insight_class_id FROM insight_classes WHERE is_builtin ORDER BY insight_class_id")
+        class_ids = [r[0] for r in cur.fetchall()]
+    if not class_ids:
+        raise SystemExit("No builtin insight classes, run the migrations first")
+
+    start = date.today() - timedelta(days=args.days - 1)
+    params = _Params(
+        args, start,
+        first_user_id=_max_id(conn, "users", "user_id") + 1,
+        series_base=_max_id(conn, "recurrence_series", "series_id") + 1,
+        class_ids=class_ids
+    )
+    fx = build_fx_table(args.seed, start, args.days)
+    params.currency_ids = _dimension_ids(conn, "currencies", "currency_id", "code", list(CURRENCIES))
+    params.category_ids = _dimension_ids(
+        conn, "expense_categories", "category_id", "name",
+        [c[0] for c in EXPENSE_CATEGORIES] + SERIES_EXPENSE_CATEGORIES
+    )
+
+    stats["fx_rates"] = _load_fx(conn, fx, start, params.currency_ids, args.chunk_rows)
+    stats["users"] = _copy(conn, "users", USER_COLUMNS, _user_rows(params, args.users, hash_password(BENCH_PASSWORD)), args.chunk_rows)
+
+    customers, subscriptions = _billing_rows(
+        params, args.users,
+        customer_base=_max_id(conn, "billing_customers", "id") + 1,
+        subscription_base=_max_id(conn, "subscriptions", "id") + 1
+    )
+    stats["billing_customers"] = _copy(conn, "billing_customers", CUSTOMER_COLUMNS, customers, args.chunk_rows)
+    stats["subscriptions"] = _copy(conn, "subscriptions", SUBSCRIPTION_COLUMNS, subscriptions, args.chunk_rows)
+
+    # partitions for the generated months, otherwise those rows all land in the default partition
+    with conn.cursor() as cur:
+        for table in ("expenses", "income"):
+            cur.execute("SELECT ensure_monthly_partitions(%s, %s, %s)", (table, start, date.today()))
+    conn.commit()
+
+    first, last = params.first_user_id, params.first_user_id + args.users
+    slices = [(lo, min(lo + USER_SLICE, last)) for lo in range(first, last, USER_SLICE)]
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(params, fx)) as pool:
+        for done, counts in enumerate(pool.map(_load_user_slice, slices), 1):
+            for table, count in counts.items():
+                stats[table] = stats.get(table, 0) + count
+            print(f"{done}/{len(slices)} user slices loaded", file=sys.stderr)
+
+    # explicit ids were copied for these, move their sequences past them
+    with conn.cursor() as cur:
+        for table, column in [
+            ("users", "user_id"), ("billing_customers", "id"), ("subscriptions", "id"), ("recurrence_series", "series_id")
+        ]:
+            cur.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), (SELECT MAX({column}) FROM {table}))"
+            )
+    conn.commit()
+
+    if args.analyze:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for table in stats:
+                cur.execute(f"ANALYZE {table}")
+    conn.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(stats.values())
+    return {
+        "rows": stats,
+        "total_rows": total,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(total / elapsed) if elapsed else 0,
+        "first_user_id": params.first_user_id,
+        "login_password": BENCH_PASSWORD,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a synthetic dataset for load testing")
+    parser.add_argument("--db-url", default=os.getenv("BENCH_DB_URL"), help="defaults to BENCH_DB_URL")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=730, help="length of the ledger history")
+    parser.add_argument("--expenses-per-day", type=float, default=1.2, help="mean ad hoc expenses per user and day")
+    parser.add_argument("--insights-per-user", type=int, default=24)
+    parser.add_argument("--forecasts-per-user", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=50000, help="rows per COPY / commit")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-analyze", dest="analyze", action="store_false")
+    args = parser.parse_args()
+
+    if not args.db_url or not args.db_url.startswith("postgresql"):
+        parser.error("a postgres --db-url or BENCH_DB_URL is required")
+
+    print(json.dumps(generate(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
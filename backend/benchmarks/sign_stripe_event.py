@@ -0,0 +1,31 @@
+"""
+Prints a Stripe-Signature header for a local event file, for posting test
+events to the webhook route. Signs with STRIPE_WEBHOOK_SECRET from the settings
+unless --secret is given
+
+Run from the backend folder:
+    python -m benchmarks.sign_stripe_event event.json
+    curl -X POST localhost:8000/webhooks/stripe -H "Stripe-Signature: $(python -m benchmarks.sign_stripe_event event.json)" --data-binary @event.json
+"""
+from config import settings
+from services.stripe_service import sign_payload
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a Stripe-Signature header for an event file")
+    parser.add_argument("event_file", help="event json, signed byte for byte")
+    parser.add_argument("--secret", default=None, help="webhook secret, defaults to the configured one")
+    parser.add_argument("--timestamp", type=int, default=None, help="unix time to sign at, defaults to now")
+    args = parser.parse_args()
+
+    secret = args.secret or settings.stripe_webhook_secret
+    if not secret:
+        parser.error("no webhook secret, set STRIPE_WEBHOOK_SECRET or pass --secret")
+
+    with open(args.event_file, "rb") as f:
+        print(sign_payload(f.read(), secret, args.timestamp))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from dotenv import load_dotenv
+import os
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    All environment configuration, read once per process
+    """
+    db_url: Optional[str]
+    replica_db_url: Optional[str]           # read only routes use it when set
+    read_your_writes_secs: float            # a user's reads stay on the primary this long after they write
+
+    # auth
+    jwt_secret_key: Optional[str]
+    algorithm: Optional[str]
+    access_token_expire_mins: int
+    otp_secret_key: Optional[str]
+    admin_api_key: Optional[str]
+
+    # email
+    sendgrid_api_key: Optional[str]
+    sendgrid_template_id: Optional[str]
+    from_email: Optional[str]
+
+    # fx
+    fx_api_base_url: str
+    fx_api_key: Optional[str]
+    fx_matrix_path: Optional[str]
+    fx_stale_after_secs: float
+
+    # stripe
+    stripe_webhook_secret: Optional[str]
+    webhook_archive_dir: Optional[str]
+
+    # logging
+    log_level: str
+    log_format: str
+    log_info_sample_rate: float
+    log_queue_size: int
+
+
+@lru_cache
+def get_settings() -> Settings:
+    load_dotenv()
+    return Settings(
+        db_url=os.getenv("DB_URL"),
+        replica_db_url=os.getenv("REPLICA_DB_URL") or None,
+        read_your_writes_secs=float(os.getenv("READ_YOUR_WRITES_SECS", "5")),
+        jwt_secret_key=os.getenv("JWT_SECRET_KEY"),
+        algorithm=os.getenv("ALGORITHM"),
+        access_token_expire_mins=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINS", 30)),
+        otp_secret_key=os.getenv("OTP_SECRET_KEY"),
+        admin_api_key=os.getenv("ADMIN_API_KEY"),
+        sendgrid_api_key=os.getenv("SENDGRID_API_KEY"),
+        sendgrid_template_id=os.getenv("SENDGRID_TEMPLATE_ID"),
+        from_email=os.getenv("FROM_EMAIL"),
+        fx_api_base_url=os.getenv("FX_API_BASE_URL", "https://v6.exchangerate-api.com/v6"),
+        fx_api_key=os.getenv("FX_API_KEY"),
+        fx_matrix_path=os.getenv("FX_MATRIX_PATH"),
+        fx_stale_after_secs=float(os.getenv("FX_STALE_AFTER_SECS", "0.5")),
+        stripe_webhook_secret=os.getenv("STRIPE_WEBHOOK_SECRET"),
+        webhook_archive_dir=os.getenv("WEBHOOK_ARCHIVE_DIR"),
+        log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        log_format=os.getenv("LOG_FORMAT", "text").lower(),                         # "text" or "json"
+        log_info_sample_rate=float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0")),     # share of requests whose INFO lines are kept
+        log_queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    )
+
+
+settings = get_settings()
@@ -1,14 +1,18 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
+from config import settings
+from utils.metrics import instrument_engine
 
-load_dotenv()
-DB_URL = os.getenv("DB_URL")
+engine = create_engine(settings.db_url)
+instrument_engine(engine)
 
-engine = create_engine(DB_URL)
+# reads that tolerate replication lag, the primary itself when no replica is configured
+replica_engine = create_engine(settings.replica_db_url) if settings.replica_db_url else engine
+if replica_engine is not engine:
+    instrument_engine(replica_engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
 
 Base = declarative_base()
\ No newline at end of file
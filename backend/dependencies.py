@@ -1,13 +1,15 @@
 from database import SessionLocal
 from sqlalchemy.orm import Session
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer
 from models.core.user import User
 from schemas.core.token import TokenPayload
 from services.fx_service import fx_service
-from utils.security import decode_access_token
-from jose import JWTError
+from services.entitlement_service import Entitlement, entitlement_cache
+from services.replica_routing import read_session, bind_writer
+from utils.security import decode_access_token, verify_admin_key
 from utils.logger import logger
+from typing import Optional
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
@@ -21,24 +23,40 @@ def get_db():
         db.close()
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    logger.debug("Getting user")
-
+def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """
+    User id from the access token, without loading the user
+    """
     try:
         payload = decode_access_token(token)
         token_data = TokenPayload(**payload)
+        user_id = int(token_data.sub)
         logger.debug("Successfully decoded token")
-    except (JWTError, ValueError):
+    except ValueError:
         logger.error("Couldn't decode token, can't get user")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token, can't authorize access"
         )
+    return user_id
+
+
+def get_read_db(user_id: int = Depends(get_current_user_id)):
+    """
+    Session for read only routes, on the replica when one is configured. A user
+    who wrote in the last READ_YOUR_WRITES_SECS reads from the primary instead
+    """
+    db: Session = read_session(user_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _load_user(db: Session, user_id: int) -> User:
+    logger.debug("Getting user")
     
-    user = db.query(User).filter(User.user_id == int(token_data.sub)).first()
+    user = db.query(User).filter(User.user_id == user_id).first()
     if not user:
         logger.error("User does not exist, can't get user")
         raise HTTPException(
@@ -48,5 +66,56 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+) -> User:
+    bind_writer(db, user_id)        # writes committed on this session pin the user's reads to the primary
+    return _load_user(db, user_id)
+
+
+def get_current_read_user(
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+) -> User:
+    """
+    Current user loaded through the read session, for read only routes
+    """
+    return _load_user(db, user_id)
+
+
+def require_subscription(
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+) -> Entitlement:
+    """
+    Gates premium routes on an ACTIVE/TRIAL subscription. The session only
+    connects on a cache miss, so cached users cost no DB round trip
+    """
+    entitlement = entitlement_cache.get_or_load(db, user_id)
+    if not entitlement.active:
+        logger.warning("User %s has no active subscription", user_id)
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail={
+                "code": "SUBSCRIPTION_REQUIRED",
+                "message": "An active subscription is required"
+            }
+        )
+    return entitlement
+
+
+def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    if not verify_admin_key(x_admin_key):
+        logger.warning("Invalid admin key, can't access admin endpoint")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "code": "NOT_ADMIN",
+                "message": "Admin access required"
+            }
+        )
+
+
 def get_fx_service():
     return fx_service
\ No newline at end of file
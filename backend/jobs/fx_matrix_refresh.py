@@ -0,0 +1,86 @@
+"""
+Refreshes the shared FX rate matrix that all uvicorn workers on the host map
+read only, and stores the day's USD rates in fx_rates
+
+Run from the backend folder, e.g. from cron shortly after the upstream daily update:
+    python -m jobs.fx_matrix_refresh --once
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from database import SessionLocal
+from models.core.fx_rate import FXRate
+from services.fx_matrix import write_matrix
+from services.dimension_registry import currency_registry
+from services.fx_service import fx_service, FX_MATRIX_PATH
+from services.invalidation_bus import invalidation_bus, InvalidationKind
+from utils.logger import logger
+import argparse
+import asyncio
+import time
+
+
+def store_usd_rates(db: Session, usd_rates: dict, rate_date) -> int:
+    """
+    Inserts the USD -> currency rates of the day, existing rows are kept. Commits
+    """
+    currency_ids = currency_registry.ensure_ids(usd_rates)
+    rows = [
+        {"original_currency_id": currency_ids["USD"], "to_currency_id": currency_ids[code], "rate": rate, "rate_date": rate_date}
+        for code, rate in usd_rates.items()
+        if code != "USD"
+    ]
+    stmt = insert(FXRate).values(rows).on_conflict_do_nothing(constraint="uq_fx_rates_rate_date")
+    inserted = db.execute(stmt).rowcount
+    invalidation_bus.publish(db, InvalidationKind.FX_RATES)     # workers re-check the matrix file now instead of within check_interval
+    db.commit()
+    return inserted
+
+
+async def refresh(db: Session) -> dict:
+    started = time.perf_counter()
+    rate_date, usd_rates = await fx_service.get_usd_rates()
+
+    write_matrix(FX_MATRIX_PATH, usd_rates, rate_date)
+    stored = store_usd_rates(db, usd_rates, rate_date)
+
+    metrics = {
+        "rate_date": rate_date.isoformat(),
+        "currencies": len(usd_rates),
+        "stored": stored,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("FX matrix refreshed at %s: %s", FX_MATRIX_PATH, metrics)
+    return metrics
+
+
+async def run(interval: float, once: bool = False) -> None:
+    try:
+        while True:
+            db = SessionLocal()
+            try:
+                await refresh(db)
+            except Exception as e:
+                logger.error("FX matrix refresh failed: %s", e)
+                if once:
+                    raise
+            finally:
+                db.close()
+
+            if once:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        await fx_service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the shared FX rate matrix")
+    parser.add_argument("--interval", type=float, default=3600, help="seconds between refreshes")
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.interval, args.once))
+
+
+if __name__ == "__main__":
+    main()
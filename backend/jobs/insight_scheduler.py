@@ -0,0 +1,152 @@
+"""
+Batch insight generation across all users
+
+Run from the backend folder:
+    python -m jobs.insight_scheduler --workers 4 --stub-latency-ms 200
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.agent.insight import Insight
+from services.insight_service import (
+    InsightLLM, InsightTask, enabled_insight_tasks, compute_tool_payload, payload_hash,
+    existing_payload_hashes, make_stub_llm, load_llm
+)
+from utils.logger import logger
+from typing import List, Optional
+import argparse
+import json
+import os
+import time
+
+
+def _call_llm(llm: InsightLLM, task: InsightTask, payload: dict) -> Optional[dict]:
+    try:
+        return llm(task, payload)
+    except Exception as e:
+        logger.error("LLM step failed for user %s class %s: %s", task.user_id, task.key, e)
+        return None
+
+
+def generate_insights(
+    db: Session,
+    tasks: List[InsightTask],
+    pool: ProcessPoolExecutor,
+    llm_pool: ThreadPoolExecutor,
+    llm: InsightLLM,
+    workers: int
+) -> dict:
+    """
+    Computes tool payloads in the process pool, runs the LLM step in the
+    thread pool and bulk inserts the resulting insights. Tasks whose payload
+    hash already has an insight are skipped, the previous insight stays current
+
+    Returns:
+    - {'inserted': int, 'cached': int, 'failed': int}
+    """
+
+    hashes = [payload_hash(t) for t in tasks]
+    cached = existing_payload_hashes(db, hashes)
+    fresh = [(t, h) for t, h in zip(tasks, hashes) if h not in cached]
+    fresh_tasks = [t for t, _ in fresh]
+
+    chunksize = max(1, len(fresh_tasks) // (workers * 4))
+    payloads = list(pool.map(compute_tool_payload, fresh_tasks, chunksize=chunksize))
+
+    ready = [(t, h, p) for (t, h), p in zip(fresh, payloads) if p is not None]
+    llm_results = list(llm_pool.map(lambda thp: _call_llm(llm, thp[0], thp[2]), ready))
+
+    rows = [
+        {
+            "user_id": task.user_id,
+            "insight_class_id": task.insight_class_id,
+            "raw_tool_payload": payload,
+            "llm_insights": llm_insights,
+            "payload_hash": task_hash,
+        }
+        for (task, task_hash, payload), llm_insights in zip(ready, llm_results)
+        if llm_insights is not None
+    ]
+
+    if rows:
+        db.execute(insert(Insight), rows)
+        db.commit()
+
+    return {
+        "inserted": len(rows),
+        "cached": len(tasks) - len(fresh),
+        "failed": len(fresh) - len(rows)
+    }
+
+
+def run(
+    llm: InsightLLM,
+    batch_size: int = 1000,
+    workers: Optional[int] = None,
+    llm_concurrency: int = 16
+) -> dict:
+    """
+    Generates insights for every verified user and enabled class,
+    paging through (user, class) pairs by id
+
+    Args:
+    - llm: callable turning (task, raw payload) into the llm_insights json
+    - batch_size: (user, class) pairs loaded and inserted per batch
+    - workers: process pool size, defaults to the cpu count
+    - llm_concurrency: number of LLM calls in flight
+
+    Returns:
+    - run stats
+    """
+
+    workers = workers or os.cpu_count() or 1
+    stats = {"users": 0, "tasks": 0, "inserted": 0, "cached": 0, "failed": 0}
+    started = time.perf_counter()
+    after = (0, 0)          # (user_id, insight_class_id) keyset cursor
+
+    db = SessionLocal()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool, \
+             ThreadPoolExecutor(max_workers=llm_concurrency) as llm_pool:
+            while True:
+                tasks = enabled_insight_tasks(db, after, batch_size)
+                if not tasks:
+                    break
+
+                # a user cut by the previous batch continues here, don't count them twice
+                stats["users"] += len({t.user_id for t in tasks} - {after[0]})
+                after = (tasks[-1].user_id, tasks[-1].insight_class_id)
+                result = generate_insights(db, tasks, pool, llm_pool, llm, workers)
+
+                stats["tasks"] += len(tasks)
+                stats["inserted"] += result["inserted"]
+                stats["cached"] += result["cached"]
+                stats["failed"] += result["failed"]
+                logger.info("Insight batch done up to user %s class %s: %s", *after, result)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["tasks_per_second"] = round(stats["tasks"] / elapsed, 2) if elapsed else 0.0
+    logger.info("Insight generation finished: %s", stats)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate insights for all users")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--llm-concurrency", type=int, default=16)
+    parser.add_argument("--llm", default=None, help="LLM callable as 'module:attribute', stubbed when omitted")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    llm = load_llm(args.llm) if args.llm else make_stub_llm(args.stub_latency_ms / 1000)
+    stats = run(llm, args.batch_size, args.workers, args.llm_concurrency)
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
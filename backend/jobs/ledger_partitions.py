@@ -0,0 +1,132 @@
+"""
+Keeps the monthly partitions of expenses and income ahead of the calendar.
+Rows dated outside every partition land in the default partition, each run
+moves them into partitions of their own month. Rows older than HISTORY_YEARS
+(and bad dates like year 1) stay in the default partition, as in the
+migration that partitioned the tables. Old months can be detached,
+they become standalone tables that can be archived or dropped without
+touching the live tables
+
+Run from the backend folder, e.g. daily from cron:
+    python -m jobs.ledger_partitions --once
+    python -m jobs.ledger_partitions --once --detach-before 2018-01-01
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from database import SessionLocal
+from utils.logger import logger
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import argparse
+import re
+import time
+
+PARTITIONED_TABLES = ("expenses", "income")
+HISTORY_YEARS = 10          # same bound as migration c146a5e8e8c2
+PARTITION_SUFFIX = re.compile(r"_(\d{4})_(\d{2})$")
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def ensure_partitions(db: Session, today: date, months_ahead: int = 3) -> Dict[str, int]:
+    """
+    Creates the partitions from this month to months_ahead, plus the months of
+    rows sitting in the default partition, back to HISTORY_YEARS. Commits
+
+    Returns:
+    - partitions created per table
+    """
+    created = {}
+    to_month = _add_months(today.replace(day=1), months_ahead)
+    oldest_month = _add_months(today.replace(day=1), -12 * HISTORY_YEARS)
+    for table in PARTITIONED_TABLES:
+        count = db.execute(
+            text("SELECT ensure_monthly_partitions(:table, :from_month, :to_month)"),
+            {"table": table, "from_month": today, "to_month": to_month}
+        ).scalar()
+
+        stray_months = db.execute(
+            text(f"SELECT DISTINCT date_trunc('month', date)::date FROM {table}_default WHERE date >= :oldest_month"),
+            {"oldest_month": oldest_month}
+        ).scalars().all()
+        for month in stray_months:
+            count += db.execute(
+                text("SELECT ensure_monthly_partitions(:table, :month, :month)"),
+                {"table": table, "month": month}
+            ).scalar()
+
+        db.commit()
+        created[table] = count
+    return created
+
+
+def detach_partitions_before(db: Session, table: str, before: date) -> List[str]:
+    """
+    Detaches the monthly partitions of table that end on or before before. Commits
+
+    Returns:
+    - names of the detached tables
+    """
+    partitions = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass) ORDER BY c.relname"
+        ),
+        {"table": table}
+    ).scalars().all()
+
+    detached = []
+    for name in partitions:
+        match = PARTITION_SUFFIX.search(name)
+        if match is None:           # the default partition
+            continue
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if _add_months(month, 1) <= before:
+            db.execute(text(f'ALTER TABLE {table} DETACH PARTITION "{name}"'))
+            db.commit()
+            detached.append(name)
+            logger.info("Detached partition %s from %s", name, table)
+    return detached
+
+
+def maintain(db: Session, months_ahead: int = 3, detach_before: Optional[date] = None) -> dict:
+    started = time.perf_counter()
+    metrics = {"created": ensure_partitions(db, date.today(), months_ahead)}
+    if detach_before is not None:
+        metrics["detached"] = {table: detach_partitions_before(db, table, detach_before) for table in PARTITIONED_TABLES}
+
+    metrics["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info("Ledger partition maintenance finished: %s", metrics)
+    return metrics
+
+
+def run(interval: float, months_ahead: int, detach_before: Optional[date] = None, once: bool = False) -> None:
+    while True:
+        db = SessionLocal()
+        try:
+            maintain(db, months_ahead, detach_before)
+        finally:
+            db.close()
+
+        if once:
+            break
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create upcoming ledger partitions and detach old ones")
+    parser.add_argument("--interval", type=float, default=timedelta(days=1).total_seconds(), help="seconds between runs")
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument("--detach-before", type=lambda s: datetime.strptime(s, "%Y-%m-%d").date(), default=None,
+                        help="detach months ending on or before this date, YYYY-MM-DD")
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    run(args.interval, args.months_ahead, args.detach_before, args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Re-prices expenses and income after fx_rates rows were corrected or backfilled.
+usd_amount and fx_rate_to_usd are rewritten from the stored rate of each row's
+(currency, fx_date), one set based UPDATE per id range chunk. Only rows whose
+rate differs are written, so a rerun is cheap. Each chunk is its own short
+transaction with a lock_timeout, and the ledger_version triggers bump every
+touched user, which keeps the ledger caches keyed on it in sync
+
+Run from the backend folder:
+    python -m jobs.ledger_repricing --from 2026-01-01 --to 2026-03-31 --currency EUR
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from database import SessionLocal
+from services.dimension_registry import currency_registry
+from utils.logger import logger
+from datetime import date, datetime
+from typing import List, Optional
+import argparse
+import time
+
+# table -> id column
+LEDGER_TABLES = {"expenses": "expense_id", "income": "income_id"}
+LOCK_NOT_AVAILABLE = "55P03"
+MAX_LOCK_RETRIES = 5
+PROGRESS_EVERY_SECS = 10.0
+
+# currency -> USD rate per day, the direct row when stored, else the inverse of the USD -> currency row
+RATES_TO_USD = """
+    SELECT f.original_currency_id AS currency_id, f.rate_date, f.rate AS rate_to_usd
+    FROM fx_rates f
+    WHERE f.to_currency_id = :usd_id AND f.rate_date BETWEEN :from_date AND :to_date
+    UNION ALL
+    SELECT f.to_currency_id, f.rate_date, round(1 / f.rate, 8)
+    FROM fx_rates f
+    WHERE f.original_currency_id = :usd_id AND f.rate_date BETWEEN :from_date AND :to_date
+      AND NOT EXISTS (
+          SELECT 1 FROM fx_rates d
+          WHERE d.original_currency_id = f.to_currency_id AND d.to_currency_id = :usd_id AND d.rate_date = f.rate_date
+      )
+"""
+
+
+def _reprice_sql(table: str, id_column: str, currency_filter: bool) -> str:
+    return f"""
+        UPDATE {table} AS l
+        SET fx_rate_to_usd = r.rate_to_usd,
+            usd_amount = round(l.original_amount * r.rate_to_usd, 2)
+        FROM ({RATES_TO_USD}) AS r
+        WHERE l.currency_id = r.currency_id
+          AND l.fx_date = r.rate_date
+          AND l.{id_column} >= :lo AND l.{id_column} < :hi
+          AND l.date >= :from_date
+          {"AND l.currency_id = ANY(:currency_ids)" if currency_filter else ""}
+          AND l.fx_rate_to_usd IS DISTINCT FROM r.rate_to_usd
+    """
+
+
+def _reprice_chunk(db: Session, sql: str, params: dict, lock_timeout_ms: int) -> int:
+    """
+    Runs one chunk in its own transaction, retrying when a row lock isn't granted in time. Commits
+    """
+    for attempt in range(1, MAX_LOCK_RETRIES + 1):
+        try:
+            db.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {"timeout": f"{lock_timeout_ms}ms"})
+            updated = db.execute(text(sql), params).rowcount
+            db.commit()
+            return updated
+        except OperationalError as e:
+            db.rollback()
+            if getattr(e.orig, "pgcode", None) != LOCK_NOT_AVAILABLE or attempt == MAX_LOCK_RETRIES:
+                raise
+            logger.warning("Chunk %s-%s is locked, retry %s", params["lo"], params["hi"], attempt)
+            time.sleep(0.2 * attempt)
+    return 0
+
+
+def reprice_table(
+    db: Session,
+    table: str,
+    from_date: date,
+    to_date: date,
+    currency_ids: Optional[List[int]] = None,
+    chunk_size: int = 10_000,
+    lock_timeout_ms: int = 2000,
+    pause: float = 0.0
+) -> dict:
+    """
+    Re-prices the rows of table priced between from_date and to_date
+
+    Args:
+    - currency_ids: only rows in these currencies, all when None
+    - chunk_size: width of each id range
+    - pause: seconds slept between chunks, keeps replication lag down on big runs
+
+    Returns:
+    - run metrics
+    """
+    id_column = LEDGER_TABLES[table]
+    usd_id = currency_registry.get_id(db, "USD")
+    metrics = {"updated": 0, "chunks": 0}
+    if usd_id is None:
+        return metrics
+
+    # a rate never comes from after the row's date, so fx_date >= from_date implies date >= from_date,
+    # which prunes the older partitions
+    lo, hi = db.execute(
+        text(f"SELECT MIN({id_column}), MAX({id_column}) FROM {table} WHERE date >= :from_date"),
+        {"from_date": from_date}
+    ).one()
+    db.commit()
+    if lo is None:
+        return metrics
+
+    sql = _reprice_sql(table, id_column, currency_ids is not None)
+    params = {"usd_id": usd_id, "from_date": from_date, "to_date": to_date, "currency_ids": currency_ids}
+    started = last_report = time.perf_counter()
+    for chunk_lo in range(lo, hi + 1, chunk_size):
+        params.update(lo=chunk_lo, hi=chunk_lo + chunk_size)
+        metrics["updated"] += _reprice_chunk(db, sql, params, lock_timeout_ms)
+        metrics["chunks"] += 1
+
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_EVERY_SECS:
+            done = (min(chunk_lo + chunk_size, hi + 1) - lo) / (hi + 1 - lo)
+            logger.info(
+                "Re-pricing %s: %.1f%% of ids, %s rows updated, %.0f ids/s",
+                table, done * 100, metrics["updated"], (chunk_lo + chunk_size - lo) / (now - started)
+            )
+            last_report = now
+        if pause:
+            time.sleep(pause)
+
+    metrics["seconds"] = round(time.perf_counter() - started, 3)
+    return metrics
+
+
+def reprice(
+    db: Session,
+    from_date: date,
+    to_date: date,
+    currencies: Optional[List[str]] = None,
+    chunk_size: int = 10_000,
+    lock_timeout_ms: int = 2000,
+    pause: float = 0.0
+) -> dict:
+    currency_ids = None
+    if currencies:
+        currency_ids = [i for i in (currency_registry.get_id(db, c) for c in currencies) if i is not None]
+        if not currency_ids:
+            logger.warning("None of the currencies %s are stored, nothing to re-price", currencies)
+            return {}
+
+    metrics = {
+        table: reprice_table(db, table, from_date, to_date, currency_ids, chunk_size, lock_timeout_ms, pause)
+        for table in LEDGER_TABLES
+    }
+    logger.info("Ledger re-pricing finished: %s", metrics)
+    return metrics
+
+
+def main():
+    to_date = lambda s: datetime.strptime(s, "%Y-%m-%d").date()
+    parser = argparse.ArgumentParser(description="Re-price ledger rows from the stored fx rates")
+    parser.add_argument("--from", dest="from_date", type=to_date, required=True, help="first fx date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="to_date", type=to_date, default=date.today(), help="last fx date, defaults to today")
+    parser.add_argument("--currency", action="append", dest="currencies", help="only this currency, repeatable")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="ids per UPDATE")
+    parser.add_argument("--lock-timeout-ms", type=int, default=2000)
+    parser.add_argument("--pause-ms", type=float, default=0, help="sleep between chunks")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        reprice(db, args.from_date, args.to_date, args.currencies, args.chunk_size, args.lock_timeout_ms, args.pause_ms / 1000)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
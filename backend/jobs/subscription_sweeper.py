@@ -0,0 +1,114 @@
+"""
+Expires subscriptions whose period or trial ended without a webhook telling us
+
+Run from the backend folder:
+    python -m jobs.subscription_sweeper --interval 300
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func
+from database import SessionLocal
+from models.stripe.subscription import Subscription, SubscriptionStatus
+from services.invalidation_bus import invalidation_bus, InvalidationKind
+from utils.logger import logger
+from datetime import datetime, timedelta, timezone
+import argparse
+import time
+
+# (status, column) pairs swept, each backed by a (status, column) index
+SWEEPS = [
+    (SubscriptionStatus.ACTIVE, Subscription.current_period_end),
+    (SubscriptionStatus.TRIAL, Subscription.current_period_end),
+    (SubscriptionStatus.TRIAL, Subscription.trial_end),
+]
+
+
+def expire_batch(db: Session, status: SubscriptionStatus, column, cutoff: datetime, batch_size: int) -> list[int]:
+    """
+    Moves up to batch_size subscriptions of the given status whose column is
+    before cutoff to EXPIRED, with a single UPDATE. Commits
+
+    Returns:
+    - user ids of the expired subscriptions
+    """
+
+    expired_ids = (
+        select(Subscription.id)
+        .where(Subscription.status == status, column < cutoff)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(Subscription)
+        .where(Subscription.id.in_(expired_ids))
+        .values(status=SubscriptionStatus.EXPIRED, updated_at=func.now())
+        .returning(Subscription.user_id)
+    )
+
+    user_ids = list(db.execute(stmt).scalars())
+    for user_id in user_ids:
+        invalidation_bus.publish(db, InvalidationKind.ENTITLEMENT, user_id)
+    db.commit()
+    return user_ids
+
+
+def sweep(db: Session, grace: timedelta = timedelta(hours=1), batch_size: int = 1000) -> dict:
+    """
+    Expires all lapsed subscriptions in batches, short transactions keep
+    row locks brief next to the webhook worker
+
+    Args:
+    - grace: how long after the boundary a late webhook may still renew the subscription
+    - batch_size: rows updated per statement
+
+    Returns:
+    - run metrics, expired counts per status
+    """
+
+    started = time.perf_counter()
+    cutoff = datetime.now(timezone.utc) - grace
+    metrics = {"expired_active": 0, "expired_trial": 0, "batches": 0}
+
+    for status, column in SWEEPS:
+        while True:
+            user_ids = expire_batch(db, status, column, cutoff, batch_size)
+            if not user_ids:
+                break
+
+            metrics["batches"] += 1
+            metrics[f"expired_{status.value.lower()}"] += len(user_ids)
+
+            if len(user_ids) < batch_size:
+                break
+
+    metrics["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info("Subscription sweep finished: %s", metrics)
+    return metrics
+
+
+def run(interval: float, grace: timedelta, batch_size: int, once: bool = False) -> None:
+    while True:
+        db = SessionLocal()
+        try:
+            sweep(db, grace, batch_size)
+        finally:
+            db.close()
+
+        if once:
+            break
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expire lapsed subscriptions")
+    parser.add_argument("--interval", type=float, default=300, help="seconds between sweeps")
+    parser.add_argument("--grace-minutes", type=float, default=60)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    run(args.interval, timedelta(minutes=args.grace_minutes), args.batch_size, args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Moves old PROCESSED stripe webhook events out of the hot table into
+gzipped JSON lines files, so webhook_events and its indexes stay small
+
+Run from the backend folder:
+    python -m jobs.webhook_archiver --older-than-days 30
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, text
+from database import SessionLocal, engine
+from models.stripe.webhook_event import WebhookEvent, WebhookStatus
+from utils.logger import logger
+from config import settings
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import argparse
+import gzip
+import json
+import os
+import time
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARCHIVE_DIR = Path(settings.webhook_archive_dir or BASE_DIR / "archive" / "webhook_events")
+MIN_RETENTION_DAYS = 7          # stripe retries deliveries for up to 3 days, keep ids around past that
+
+
+def _write_archive(rows: list, archive_dir: Path) -> Path:
+    day_dir = archive_dir / datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    day_dir.mkdir(parents=True, exist_ok=True)
+    path = day_dir / f"webhook_events_{rows[0].id}_{rows[-1].id}.jsonl.gz"
+    tmp_path = path.with_suffix(".tmp")
+
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps({
+                "id": r.id,
+                "stripe_event_id": r.stripe_event_id,
+                "type": r.type,
+                "stripe_created_ts": r.stripe_created_ts,
+                "received_at": r.received_at.isoformat(),
+                "processed_at": r.processed_at.isoformat() if r.processed_at else None,
+                "payload": r.payload,
+            }))
+            f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int, archive_dir: Path = ARCHIVE_DIR) -> int:
+    """
+    Deletes up to batch_size processed events received before cutoff and writes
+    them to an archive file. The file is written before the delete commits, so
+    a failure can only leave an event in both places, never in neither
+
+    Returns:
+    - number of archived events
+    """
+
+    archived_ids = (
+        select(WebhookEvent.id)
+        .where(WebhookEvent.status == WebhookStatus.PROCESSED, WebhookEvent.received_at < cutoff)
+        .order_by(WebhookEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        delete(WebhookEvent)
+        .where(WebhookEvent.id.in_(archived_ids))
+        .returning(
+            WebhookEvent.id,
+            WebhookEvent.stripe_event_id,
+            WebhookEvent.type,
+            WebhookEvent.stripe_created_ts,
+            WebhookEvent.received_at,
+            WebhookEvent.processed_at,
+            WebhookEvent.payload
+        )
+    )
+
+    rows = sorted(db.execute(stmt).all(), key=lambda r: r.id)
+    if not rows:
+        db.rollback()
+        return 0
+
+    try:
+        path = _write_archive(rows, archive_dir)
+    except Exception:
+        db.rollback()
+        raise
+
+    db.commit()
+    logger.info("Archived %s webhook events to %s", len(rows), path)
+    return len(rows)
+
+
+def archive(db: Session, older_than: timedelta, batch_size: int = 5000, archive_dir: Path = ARCHIVE_DIR) -> dict:
+    started = time.perf_counter()
+    cutoff = datetime.now(timezone.utc) - older_than
+    metrics = {"archived": 0, "batches": 0}
+
+    while True:
+        archived = archive_batch(db, cutoff, batch_size, archive_dir)
+        if not archived:
+            break
+        metrics["archived"] += archived
+        metrics["batches"] += 1
+
+    metrics["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info("Webhook archival finished: %s", metrics)
+    return metrics
+
+
+def vacuum() -> None:
+    # VACUUM can't run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM (ANALYZE) webhook_events"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old processed stripe webhook events")
+    parser.add_argument("--older-than-days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR)
+    parser.add_argument("--vacuum", action="store_true", help="vacuum the table after archiving")
+    args = parser.parse_args()
+
+    if args.older_than_days < MIN_RETENTION_DAYS:
+        parser.error(f"--older-than-days must be at least {MIN_RETENTION_DAYS}")
+
+    db = SessionLocal()
+    try:
+        archive(db, timedelta(days=args.older_than_days), args.batch_size, args.archive_dir)
+    finally:
+        db.close()
+
+    if args.vacuum:
+        vacuum()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Applies received stripe webhook events to billing customers and subscriptions
+
+Several workers can run at once, each claims its own batch with FOR UPDATE SKIP LOCKED.
+Run from the backend folder:
+    python -m jobs.webhook_worker --batch-size 50
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from database import SessionLocal
+from models.stripe.webhook_event import WebhookEvent, WebhookStatus
+from services.stripe_service import apply_event
+from services.invalidation_bus import invalidation_bus, InvalidationKind
+from utils.logger import logger
+import argparse
+import time
+
+
+def process_batch(db: Session, batch_size: int = 50) -> int:
+    """
+    Claims up to batch_size received events, oldest stripe timestamp first,
+    and applies them in order. The row locks are held until the commit, so a
+    crashed worker leaves its events RECEIVED for the others to pick up
+
+    Returns:
+    - number of events handled
+    """
+
+    events = (
+        db.query(WebhookEvent)
+        .filter(WebhookEvent.status == WebhookStatus.RECEIVED)
+        .order_by(WebhookEvent.stripe_created_ts, WebhookEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    changed_user_ids = set()
+    for event in events:
+        try:
+            with db.begin_nested():         # one failing event doesn't roll back the batch
+                user_id = apply_event(db, event.payload)
+            if user_id is not None:
+                changed_user_ids.add(user_id)
+            event.status = WebhookStatus.PROCESSED
+            event.error = None
+        except Exception as e:
+            logger.error("Failed to process stripe event %s: %s", event.stripe_event_id, e)
+            event.status = WebhookStatus.FAILED
+            event.error = str(e)
+        event.processed_at = func.now()
+
+    for user_id in changed_user_ids:
+        invalidation_bus.publish(db, InvalidationKind.ENTITLEMENT, user_id)        # sent to the API workers on commit
+    db.commit()
+    return len(events)
+
+
+def run(batch_size: int = 50, poll_interval: float = 1.0, once: bool = False) -> None:
+    logger.info("Stripe webhook worker started")
+
+    while True:
+        db = SessionLocal()
+        try:
+            handled = process_batch(db, batch_size)
+        finally:
+            db.close()
+
+        if handled:
+            logger.info("Processed %s stripe events", handled)
+        elif once:
+            break
+        else:
+            time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process received stripe webhook events")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--once", action="store_true", help="exit once no events are left")
+    args = parser.parse_args()
+
+    run(args.batch_size, args.poll_interval, args.once)
+
+
+if __name__ == "__main__":
+    main()
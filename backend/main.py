@@ -1,9 +1,44 @@
-from fastapi import FastAPI, Depends
+import time
+IMPORT_STARTED = time.perf_counter()        # before the app imports, so they are part of the measured startup
+
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from routers import auth, settings, insight_classes, fx
+from fastapi.responses import PlainTextResponse
+from routers import auth, settings, insight_classes, fx, insights, forecasts, ledger, admin, webhooks
 from dependencies import get_db
+from services.insight_class_registry import insight_class_registry
+from services.fx_service import fx_service
+from services.invalidation_bus import invalidation_bus
+from services.dimension_registry import currency_registry, category_registry
+from utils.metrics import registry, RequestStats, current_request_stats, record_request, startup_seconds
+from utils.logger import logger, request_id_var
+from utils.responses import ORJSONResponse
+from contextlib import asynccontextmanager
+import re
+import uuid
+
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    lifespan_started = time.perf_counter()
+    invalidation_bus.start()            # before loading caches, so no change slips in between
+    insight_class_registry.refresh()
+    currency_registry.refresh()
+    category_registry.refresh()
+    fx_service.open()
 
-app = FastAPI()
+    startup_seconds.set(lifespan_started - IMPORT_STARTED, phase="import")
+    startup_seconds.set(time.perf_counter() - lifespan_started, phase="lifespan")
+    startup_seconds.set(time.perf_counter() - IMPORT_STARTED, phase="total")
+    logger.info("App ready in %.3fs (imports %.3fs)", time.perf_counter() - IMPORT_STARTED, lifespan_started - IMPORT_STARTED)
+    yield
+    await fx_service.close()
+    invalidation_bus.stop()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
 ]
@@ -16,11 +51,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        current_request_stats.reset(token)
+        route = request.scope.get("route")
+        record_request(
+            request.method,
+            route.path if route is not None else "unmatched",       # templated path keeps label cardinality bounded
+            status,
+            time.perf_counter() - started,
+            stats
+        )
+
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    # reuse the caller's id when it looks sane so logs line up across services
+    request_id = request.headers.get("X-Request-ID", "")
+    if not REQUEST_ID_PATTERN.match(request_id):
+        request_id = uuid.uuid4().hex
+
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 app.include_router(auth.router)
 app.include_router(settings.router)
 app.include_router(insight_classes.router)
 app.include_router(fx.router)
+app.include_router(insights.router)
+app.include_router(forecasts.router)
+app.include_router(ledger.router)
+app.include_router(admin.router)
+app.include_router(webhooks.router)
 
 @app.get("/")
 def root():
-    return {"message":"Welcome to CashVise"}
\ No newline at end of file
+    return {"message":"Welcome to CashVise"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -5,6 +5,8 @@ from .core.insight_class import InsightClass
 from .core.income import Income
 from .core.expense import Expense
 from .core.fx_rate import FXRate
+from .core.currency import Currency
+from .core.expense_category import ExpenseCategory
 
 from .agent.forecast import Forecast
 from .agent.insight import Insight
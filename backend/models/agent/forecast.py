@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, func, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 from database import Base
@@ -12,4 +12,9 @@ class Forecast(Base):
     forecast = Column(JSONB, nullable=False)
 
     # relations
-    user = relationship("User", back_populates="forecasts")
\ No newline at end of file
+    user = relationship("User", back_populates="forecasts")
+
+    # indexes
+    __table_args__ = (
+        Index("ix_forecasts_user_id_generated_on", "user_id", "generated_on"),
+    )
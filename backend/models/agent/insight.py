@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Index
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.dialects.postgresql import JSONB
 from database import Base
 
@@ -10,9 +10,16 @@ class Insight(Base):
     user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
     generated_on = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     insight_class_id = Column(Integer, ForeignKey("insight_classes.insight_class_id", ondelete="CASCADE"), nullable=False)
-    raw_tool_payload = Column(JSONB, nullable=False)
+    raw_tool_payload = deferred(Column(JSONB, nullable=False))     # large, only loaded when asked for
     llm_insights = Column(JSONB, nullable=False)
+    payload_hash = Column(String(64), nullable=True, index=True)        # hash of the tool inputs, used to reuse previous generations
 
     # relations
     user = relationship("User", back_populates="insights")
     insight_class = relationship("InsightClass", back_populates="insights")
+
+    # indexes
+    __table_args__ = (
+        Index("ix_insights_user_id_generated_on", "user_id", "generated_on"),
+        Index("ix_insights_user_id_insight_class_id_generated_on", "user_id", "insight_class_id", "generated_on"),
+    )
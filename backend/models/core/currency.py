@@ -0,0 +1,8 @@
+from sqlalchemy import Column, SmallInteger, String
+from database import Base
+
+class Currency(Base):
+    __tablename__ = "currencies"
+
+    currency_id = Column(SmallInteger, primary_key=True)
+    code = Column(String(100), unique=True, nullable=False)         # upper case ISO code, e.g. USD
@@ -0,0 +1,8 @@
+from sqlalchemy import Column, SmallInteger, String
+from database import Base
+
+class ExpenseCategory(Base):
+    __tablename__ = "expense_categories"
+
+    category_id = Column(SmallInteger, primary_key=True)
+    name = Column(String(255), unique=True, nullable=False)
@@ -1,12 +1,12 @@
-from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, func, UniqueConstraint
+from sqlalchemy import Column, Integer, SmallInteger, ForeignKey, Numeric, Date, DateTime, func, UniqueConstraint
 from database import Base
 
 class FXRate(Base):
     __tablename__ = "fx_rates"
 
     rate_id = Column(Integer, primary_key=True, index=True)
-    original_currency = Column(String(100), nullable=False)
-    to_currency = Column(String(100), nullable=False)
+    original_currency_id = Column(SmallInteger, ForeignKey("currencies.currency_id"), nullable=False)
+    to_currency_id = Column(SmallInteger, ForeignKey("currencies.currency_id"), nullable=False)
     rate = Column(Numeric(18,8), nullable=False)
     rate_date = Column(Date, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -14,8 +14,8 @@ class FXRate(Base):
     # constraints
     __table_args__ = (
         UniqueConstraint(
-            "original_currency",
-            "to_currency",
+            "original_currency_id",
+            "to_currency_id",
             "rate_date",
             name="uq_fx_rates_rate_date"
         ),
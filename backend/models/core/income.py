@@ -1,16 +1,16 @@
-from sqlalchemy import Column, Integer, Boolean, String, Date, Numeric, ForeignKey, text, UniqueConstraint
+from sqlalchemy import Column, Integer, SmallInteger, Boolean, String, Date, Numeric, ForeignKey, text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
 class Income(Base):
     __tablename__ = "income"
 
-    income_id = Column(Integer, primary_key=True, index=True)
+    income_id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
-    date = Column(Date, nullable=False)
+    date = Column(Date, primary_key=True, nullable=False)         # partition key, postgres needs it in the primary key
     bulk = Column(Boolean, nullable=False, server_default=text("false"))
     source = Column(String(255), nullable=False)
-    currency = Column(String(100), nullable=False)          # Currency the user is entering the amount in, if none, set to preferred currency from settings by frontend
+    currency_id = Column(SmallInteger, ForeignKey("currencies.currency_id"), nullable=False)       # Currency the user is entering the amount in, if none, set to preferred currency from settings by frontend
     original_amount = Column(Numeric(12, 2), nullable=False)
     usd_amount = Column(Numeric(12, 2), nullable=False)
     fx_rate_to_usd = Column(Numeric(18, 8), nullable=True)
@@ -30,4 +30,6 @@ class Income(Base):
         "date",
         name="uq_income_series_date"
     ),
+    Index("ix_income_user_id_date", "user_id", "date"),
+    {"postgresql_partition_by": "RANGE (date)"},         # monthly partitions, see jobs/ledger_partitions.py
 )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, text
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -12,6 +12,9 @@ class User(Base):
     country = Column(String(100), nullable=False)
     city = Column(String(100))
     preferred_currency = Column(String(100), nullable=False)
+    ledger_version = Column(BigInteger, nullable=False, server_default=text("0"))     # bumped by db triggers on every ledger write
+    settings_version = Column(BigInteger, nullable=False, server_default=text("0"))   # bumped by db triggers on insight prefs writes and by profile updates
+    insights_version = Column(BigInteger, nullable=False, server_default=text("0"))   # bumped by db triggers on insights and forecasts writes
 
     # email verification
     is_verified = Column(Boolean, default=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, func
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Enum, func, Index
 from sqlalchemy.orm import relationship
 from database import Base
 import enum
@@ -30,9 +30,15 @@ class Subscription(Base):
     trial_start = Column(DateTime(timezone=True), nullable=True)
     trial_end = Column(DateTime(timezone=True), nullable=True)
 
+    # stripe created timestamp of the last applied webhook event, older events are ignored
+    stripe_event_ts = Column(BigInteger, nullable=True)
+
     # relations
     user = relationship("User", back_populates="subscriptions")
     billing_customer = relationship("BillingCustomer", back_populates="subscriptions")
 
-
-
+    # indexes, used by the expiry sweeper
+    __table_args__ = (
+        Index("ix_subscriptions_status_current_period_end", "status", "current_period_end"),
+        Index("ix_subscriptions_status_trial_end", "status", "trial_end"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, func, Text, BigInteger, Enum
+from sqlalchemy import Column, Integer, String, DateTime, func, Text, BigInteger, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 from database import Base
@@ -23,3 +23,17 @@ class WebhookEvent(Base):
     processed_at = Column(DateTime(timezone=True), nullable=True)
     error = Column(Text, nullable=True)
 
+    # indexes
+    __table_args__ = (
+        Index(                              # worker claim query, stays small since it only holds pending events
+            "ix_webhook_events_received_created_ts",
+            "stripe_created_ts",
+            "id",
+            postgresql_where=text("status = 'RECEIVED'")
+        ),
+        Index(                              # archival job, finds old processed events
+            "ix_webhook_events_processed_received_at",
+            "received_at",
+            postgresql_where=text("status = 'PROCESSED'")
+        ),
+    )
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from dependencies import get_db, require_admin
+from schemas.core.admin import AdminInsightPrefUpdate
+from services.insight_service import apply_pref_to_users
+from services.insight_class_registry import insight_class_registry
+from services.invalidation_bus import invalidation_bus, InvalidationKind
+from services.profiler_service import profiler, render_collapsed, MAX_PROFILE_SECONDS, MIN_INTERVAL_MS
+from utils.logger import logger
+import os
+
+router = APIRouter(prefix='/admin', tags=['Admin'], dependencies=[Depends(require_admin)])
+
+
+@router.post('/insight-classes/refresh', status_code=status.HTTP_200_OK)
+def refresh_insight_classes(db: Session = Depends(get_db)):
+    invalidation_bus.publish(db, InvalidationKind.INSIGHT_CLASSES)
+    db.commit()         # reloads the registry here after the commit, and in every other worker
+
+    logger.info("Admin refreshed the insight class registry")
+    return {
+        "status": "REGISTRY_REFRESHED",
+        "message": "Insight class registry reloaded.",
+        "count": len(insight_class_registry.all())
+    }
+
+
+@router.patch('/user-insight-prefs', status_code=status.HTTP_200_OK)
+def bulk_update_user_prefs(
+    update: AdminInsightPrefUpdate,
+    db: Session = Depends(get_db)
+):
+
+    insight_class = insight_class_registry.get_by_key(update.key)
+    if insight_class is None:
+        logger.warning("Admin provided an invalid insight class key")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "status": "INVALID_CLASS_KEYS",
+                "message": "Invalid insight class key is provided"
+            }
+        )
+
+    updated = apply_pref_to_users(
+        db,
+        insight_class.insight_class_id,
+        update.enable,
+        user_ids=update.user_ids,
+        overwrite=update.overwrite
+    )
+    db.commit()
+
+    logger.info("Admin set %s pref to %s for %s users", update.key, update.enable, updated)
+    return {
+        "status": "PREFS_UPDATED",
+        "message": "User insight prefs updated successfully.",
+        "updated": updated
+    }
+
+
+@router.post('/profile', response_class=PlainTextResponse)
+def profile_worker(
+    request: Request,
+    seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(10, ge=MIN_INTERVAL_MS, le=1000),
+    include_untagged: bool = Query(False)
+):
+    """
+    Samples the stacks of the worker serving this request and returns them
+    in the collapsed stack format, e.g. for flamegraph.pl or speedscope
+    """
+
+    result = profiler.profile(request.app.routes, seconds, interval_ms / 1000, include_untagged)
+    if result is None:
+        logger.warning("Admin requested a profile while one is already running")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "status": "PROFILER_BUSY",
+                "message": "A profile is already running on this worker."
+            }
+        )
+
+    samples, rounds = result
+    logger.info("Admin profiled worker %s for %ss, %s samples", os.getpid(), seconds, sum(samples.values()))
+    return PlainTextResponse(
+        render_collapsed(samples),
+        headers={"X-Profile-Pid": str(os.getpid()), "X-Profile-Rounds": str(rounds)}
+    )
@@ -8,6 +8,7 @@ from schemas.core.user import UserCreate, UserResponse, UserLogin, TokenWithUser
 from schemas.core.token import OTPVerifyRequest, ResendOTPRequest, TokenResponse
 from utils.helpers import normalize_string
 from utils.logger import logger
+from utils.responses import model_response
 from utils.security import hash_password, generate_otp, hash_otp, verify_password, create_access_token, verify_otp
 from services.email_service import send_otp
 from datetime import datetime, timedelta, timezone
@@ -66,7 +67,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
 
     send_otp(email, name, otp)
 
-    logger.info(f"New user registered and verification is pending")
+    logger.info("New user registered and verification is pending")
     return new_user
 
 
@@ -97,7 +98,7 @@ def token(data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get
     
     token = create_access_token(data={"sub":str(user.user_id)})
 
-    logger.info(f"User {user.user_id} created access token")
+    logger.info("User %s created access token", user.user_id)
     return TokenResponse(access_token=token)
 
 
@@ -128,8 +129,8 @@ def login(user_info: UserLogin, db: Session = Depends(get_db)):
     
     token = create_access_token(data={"sub":str(user.user_id)})
 
-    logger.info(f"User {user.user_id} logged in successfully")
-    return TokenWithUserResponse(access_token=token, user=user)
+    logger.info("User %s logged in successfully", user.user_id)
+    return model_response(TokenWithUserResponse(access_token=token, user=user))
 
 
 @router.post("/verify-email-otp", status_code=status.HTTP_200_OK)
@@ -247,7 +248,7 @@ def change_password(
 ):
     
     if not verify_password(password_info.old_password, user.password):
-        logger.warning(f"User is trying to change their password, but entered wrong password")
+        logger.warning("User is trying to change their password, but entered wrong password")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail={
@@ -257,7 +258,7 @@ def change_password(
         )
     
     if password_info.old_password == password_info.new_password:
-        logger.warning(f"User is using the same password to change their password")
+        logger.warning("User is using the same password to change their password")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail={
@@ -270,7 +271,7 @@ def change_password(
     db.commit()
     db.refresh(user)
 
-    logger.info("User's {user.user_id} password changed successfully")
+    logger.info("User %s changed their password successfully", user.user_id)
     return {
             "status": "PASSWORD_CHANGED",
             "message": "Password changed successfully."
@@ -298,7 +299,7 @@ def change_password(
     
 #     new_email = normalize_string(email_info.new_email)
 #     if new_email == user.email:
-#         logger.warning(f"User is using the same email to change their email")
+#         logger.warning("User is using the same email to change their email")
 #         raise HTTPException(
 #             status_code=status.HTTP_400_BAD_REQUEST,
 #             detail={
@@ -330,7 +331,7 @@ def change_password(
 #     db.commit()
 #     db.refresh(user)
 
-#     logger.info(f"User {user.user_id}'s email successfully changed, pending verification")
+#     logger.info("User %s's email successfully changed, pending verification", user.user_id)
 #     return JSONResponse(
 #             status_code=status.HTTP_202_ACCEPTED,
 #             content={
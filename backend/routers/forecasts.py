@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import tuple_
+from dependencies import get_current_read_user, get_read_db
+from models.core.user import User
+from models.agent.forecast import Forecast
+from schemas.agent.forecast import ForecastResponse, ForecastPage
+from utils.helpers import encode_cursor, decode_cursor
+from utils.logger import logger
+from utils.responses import model_response
+from utils.http_cache import make_etag, etag_headers, is_not_modified, not_modified
+from typing import Optional
+
+router = APIRouter(prefix='/forecasts', tags=['Forecasts'])
+
+
+@router.get('/', response_model=ForecastPage)
+def list_forecasts(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    include_payload: bool = Query(False, description="Also return the forecast json"),
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_read_user)
+):
+
+    etag = make_etag("forecasts", user.user_id, user.insights_version)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    columns = [Forecast.forecast_id, Forecast.generated_on]
+    if include_payload:
+        columns.append(Forecast.forecast)
+
+    query = (
+        db.query(Forecast)
+        .options(load_only(*columns))
+        .filter(Forecast.user_id == user.user_id)
+    )
+
+    if cursor is not None:
+        try:
+            generated_on, forecast_id = decode_cursor(cursor)
+        except ValueError:
+            logger.warning("User sent an invalid forecasts cursor")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "INVALID_CURSOR",
+                    "message": "The cursor is invalid, please use the one returned by the previous page"
+                }
+            )
+        query = query.filter(tuple_(Forecast.generated_on, Forecast.forecast_id) < tuple_(generated_on, forecast_id))
+
+    rows = (
+        query.order_by(Forecast.generated_on.desc(), Forecast.forecast_id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].generated_on, rows[-1].forecast_id)
+
+    logger.info("User %s requested %s forecasts", user.user_id, len(rows))
+    return model_response(ForecastPage(
+        items=[
+            ForecastResponse(
+                forecast_id=r.forecast_id,
+                generated_on=r.generated_on,
+                forecast=r.forecast if include_payload else None
+            )
+            for r in rows
+        ],
+        next_cursor=next_cursor
+    ), headers=etag_headers(etag))
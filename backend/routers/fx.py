@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from dependencies import get_current_user, get_db, get_fx_service
+from dependencies import get_current_read_user, get_db, get_read_db, get_fx_service
 from models.core.user import User
 from schemas.core.fx import FXRate, SupportedCodes, ConversionResponse
 from services.fx_service import FXService
+from utils.circuit_breaker import CircuitOpenError
 from decimal import Decimal
 from utils.logger import logger
+from utils.responses import model_response
 
 router = APIRouter(prefix='/fx', tags=['FX'])
 
@@ -13,15 +15,25 @@ router = APIRouter(prefix='/fx', tags=['FX'])
 async def get_rate(
     from_currency: str = Query(..., examples="USD"),
     to_currency: str = Query(..., examples="AED"),
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_read_user),
     fx_service: FXService = Depends(get_fx_service)
 ):
 
-    rate = await fx_service.get_latest_rate(db, from_currency, to_currency)
+    db.close()         # only the user was read, don't hold the connection while the quote may wait on the API
+    try:
+        quote = await fx_service.get_quote(db, from_currency, to_currency)
+    except CircuitOpenError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "code": "FX_UNAVAILABLE",
+                "message": "Exchange rates are temporarily unavailable, try again shortly"
+            }
+        )
 
-    logger.info(f"Returning exchange rate for {from_currency}-{to_currency}")
-    return FXRate(rate=rate)
+    logger.info("Returning exchange rate for %s-%s", from_currency, to_currency)
+    return model_response(FXRate(rate=quote.rate, rate_date=quote.rate_date, stale=quote.stale))
 
 
 @router.get('/convert-amount', response_model=ConversionResponse)
@@ -29,15 +41,25 @@ async def get_conversion(
     from_currency: str = Query(..., examples="USD"),
     to_currency: str = Query(..., examples="AED"),
     amount: Decimal = Query(...),
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_read_user),
     fx_service: FXService = Depends(get_fx_service)
 ):
 
-    data = await fx_service.convert(db, from_currency, to_currency, amount)
+    db.close()         # as in get_rate
+    try:
+        data = await fx_service.convert(db, from_currency, to_currency, amount)
+    except CircuitOpenError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "code": "FX_UNAVAILABLE",
+                "message": "Exchange rates are temporarily unavailable, try again shortly"
+            }
+        )
 
-    logger.info(f"Returning converted amount and rate for {from_currency}-{to_currency}")
-    return ConversionResponse(rate=data['rate'], amount=data['amount'])
+    logger.info("Returning converted amount and rate for %s-%s", from_currency, to_currency)
+    return model_response(ConversionResponse(**data))
 
 
 @router.get('/codes', response_model=SupportedCodes)
@@ -49,5 +71,5 @@ async def get_codes(
     codes = await fx_service.get_supported_codes()
 
     logger.info("Getting supported codes for exchange")
-    return SupportedCodes(codes=codes)
+    return model_response(SupportedCodes(codes=codes))
 
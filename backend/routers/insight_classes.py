@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 from models.core.user import User
-from models.core.insight_class import InsightClass
 from schemas.core.insight_class import InsightClassReponse
-from dependencies import get_current_user, get_db
+from services.insight_class_registry import insight_class_registry
+from dependencies import get_current_read_user
 from utils.logger import logger
 from typing import List
 
@@ -11,24 +10,20 @@ router = APIRouter(prefix='/insight-classes', tags=['Insight Classes'])
 
 @router.get('/', response_model=List[InsightClassReponse])
 def list_insight_classes(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_read_user)
 ):
-    insight_classes = db.query(InsightClass).all()
+    insight_classes = insight_class_registry.all()
 
-    logger.info("Userrequested insight classes list")
+    logger.info("User requested insight classes list")
     return insight_classes
 
 
 @router.get('/{key}', response_model=InsightClassReponse)
 def get_insight_class(
     key: str,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: User = Depends(get_current_read_user)
 ):
-    insight_class = db.query(InsightClass).filter(
-        InsightClass.key == key
-    ).first()
+    insight_class = insight_class_registry.get_by_key(key)
 
     if insight_class is None:
         logger.warning("User is trying get a non-existent insight class")
@@ -40,6 +35,6 @@ def get_insight_class(
             }
         )
     
-    logger.info(f"User {user.user_id} requested an insight class")
+    logger.info("User %s requested an insight class", user.user_id)
     return insight_class
     
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import tuple_
+from dependencies import get_current_read_user, get_read_db
+from models.core.user import User
+from models.agent.insight import Insight
+from schemas.agent.insight import InsightResponse, InsightPage
+from services.insight_class_registry import insight_class_registry
+from utils.helpers import encode_cursor, decode_cursor
+from utils.logger import logger
+from utils.responses import model_response
+from utils.http_cache import make_etag, etag_headers, is_not_modified, not_modified
+from typing import Optional
+
+router = APIRouter(prefix='/insights', tags=['Insights'])
+
+
+@router.get('/', response_model=InsightPage)
+def list_insights(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    key: Optional[str] = Query(None, description="Only insights of this insight class"),
+    include_payload: bool = Query(False, description="Also return the raw tool payload"),
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_read_user)
+):
+
+    # a query string is its own resource to the client, so the version is enough
+    etag = make_etag("insights", user.user_id, user.insights_version, insight_class_registry.fingerprint())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    columns = [Insight.insight_id, Insight.insight_class_id, Insight.generated_on, Insight.llm_insights]
+    if include_payload:
+        columns.append(Insight.raw_tool_payload)
+
+    query = (
+        db.query(Insight)
+        .options(load_only(*columns))
+        .filter(Insight.user_id == user.user_id)
+    )
+
+    if key is not None:
+        insight_class = insight_class_registry.get_by_key(key)
+        if insight_class is None:
+            logger.warning("User is trying to list insights of a non-existent insight class")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={
+                    "status": "INVALID_CLASS",
+                    "message": "The class does not exist, please use a valid key"
+                }
+            )
+        query = query.filter(Insight.insight_class_id == insight_class.insight_class_id)
+
+    if cursor is not None:
+        try:
+            generated_on, insight_id = decode_cursor(cursor)
+        except ValueError:
+            logger.warning("User sent an invalid insights cursor")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "INVALID_CURSOR",
+                    "message": "The cursor is invalid, please use the one returned by the previous page"
+                }
+            )
+        query = query.filter(tuple_(Insight.generated_on, Insight.insight_id) < tuple_(generated_on, insight_id))
+
+    rows = (
+        query.order_by(Insight.generated_on.desc(), Insight.insight_id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].generated_on, rows[-1].insight_id)
+
+    logger.info("User %s requested %s insights", user.user_id, len(rows))
+    return model_response(InsightPage(
+        items=[
+            InsightResponse(
+                insight_id=r.insight_id,
+                insight_class_id=r.insight_class_id,
+                generated_on=r.generated_on,
+                llm_insights=r.llm_insights,
+                raw_tool_payload=r.raw_tool_payload if include_payload else None
+            )
+            for r in rows
+        ],
+        next_cursor=next_cursor
+    ), headers=etag_headers(etag))
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy.orm import Session
+from dependencies import get_current_read_user, get_read_db, get_fx_service
+from models.core.user import User
+from schemas.core.ledger import NetBalanceResponse
+from services.fx_service import FXService
+from services.ledger_service import get_net_balance, net_balance_key
+from utils.circuit_breaker import CircuitOpenError
+from utils.logger import logger
+from utils.responses import model_response
+from utils.http_cache import etag_headers, is_not_modified, not_modified, CACHE_CONTROL
+from datetime import date
+from typing import Optional
+
+router = APIRouter(prefix='/ledger', tags=['Ledger'])
+
+
+@router.get('/net-balance', response_model=NetBalanceResponse)
+async def net_balance(
+    request: Request,
+    from_date: Optional[date] = Query(None, description="Defaults to the first day of the current month"),
+    to_date: Optional[date] = Query(None, description="Defaults to today"),
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_read_user),
+    fx_service: FXService = Depends(get_fx_service)
+):
+
+    to_date = to_date or date.today()
+    from_date = from_date or to_date.replace(day=1)
+    if from_date > to_date:
+        logger.warning("User sent a net balance window that ends before it starts")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "status": "INVALID_WINDOW",
+                "message": "from_date must be on or before to_date"
+            }
+        )
+
+    key = net_balance_key(fx_service, user, from_date, to_date)
+    if is_not_modified(request, key.etag):          # only ever sent for a balance the key pins down, nothing summed or converted
+        return not_modified(key.etag)
+
+    try:
+        balance, etag = await get_net_balance(db, fx_service, user, key)
+    except CircuitOpenError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "code": "FX_UNAVAILABLE",
+                "message": "Exchange rates are temporarily unavailable, try again shortly"
+            }
+        )
+
+    logger.info("User %s requested their net balance from %s to %s", user.user_id, from_date, to_date)
+    # priced from fx_rates rows or stale rates, no validator, the client refetches it next time
+    return model_response(balance, headers=etag_headers(etag) if etag is not None else {"Cache-Control": CACHE_CONTROL})
@@ -1,14 +1,15 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from dependencies import get_db, get_current_user
+from dependencies import get_db, get_read_db, get_current_user, get_current_read_user
 from models.core.user import User
-from models.core.user_insight_pref import UserInsightPref
-from models.core.insight_class import InsightClass
 from schemas.core.user import UserResponse, UserUpdate
 from schemas.core.user_insight_pref import UserInsightPrefUpdate, UserInsightPrefResponse
+from services.insight_service import builtin_prefs_query, upsert_user_prefs
+from services.insight_class_registry import insight_class_registry
 from utils.logger import logger
+from utils.responses import model_response
+from utils.http_cache import make_etag, etag_headers, is_not_modified, not_modified
 from typing import List
 
 router = APIRouter(prefix='/settings', tags=["Settings"])
@@ -49,40 +50,28 @@ def update_user_info(
             }
         )
     
+    user.settings_version = User.settings_version + 1       # preferred_currency changes what the user-scoped GETs return
     db.commit()
     db.refresh(user)
-    logger.info(f"User {user.user_id} updated their info")
+    logger.info("User %s updated their info", user.user_id)
     return user
 
 
 @router.get('/user-insight-prefs', response_model=List[UserInsightPrefResponse])
 def get_user_prefs(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    request: Request,
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_read_user)
 ):
 
-    builtin_insight_classes = (         # return user pref for all builtin classes
-        db.query(
-            InsightClass.insight_class_id,
-            InsightClass.key,
-            InsightClass.name,
-            InsightClass.is_builtin,
-            UserInsightPref.enable
-        )
-        .outerjoin(
-            UserInsightPref,
-            and_(
-                UserInsightPref.user_id == user.user_id,
-                UserInsightPref.insight_class_id == InsightClass.insight_class_id
-            )
-        )
-        .filter(InsightClass.is_builtin == True)
-        .order_by(InsightClass.insight_class_id)
-        .all()
-    )
+    etag = make_etag("prefs", user.user_id, user.settings_version, insight_class_registry.fingerprint())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    builtin_insight_classes = builtin_prefs_query(db, user.user_id).all()     # return user pref for all builtin classes
 
     logger.info("User prefs are loaded")
-    return [
+    return model_response([
         UserInsightPrefResponse(
             insight_class_id=ip.insight_class_id,
             key=ip.key,
@@ -91,7 +80,7 @@ def get_user_prefs(
             enable=True if ip.enable is None else ip.enable
         )
         for ip in builtin_insight_classes
-    ]
+    ], List[UserInsightPrefResponse], headers=etag_headers(etag))
 
 
 @router.patch('/user-insight-prefs', status_code=status.HTTP_200_OK)
@@ -112,12 +101,10 @@ def update_user_prefs(
         )
     
     keys = [u.key for u in user_updates.updates]
-    insight_classes = (
-            db.query(InsightClass).filter(
-                InsightClass.key.in_(keys), 
-                InsightClass.is_builtin == True         # For now only builtin classes
-            ).all()
-    )
+    insight_classes = [
+        c for c in map(insight_class_registry.get_by_key, set(keys))
+        if c is not None and c.is_builtin           # For now only builtin classes
+    ]
 
     get_class_by_key = {c.key: c for c in insight_classes}
     missing = [k for k in keys if k not in get_class_by_key]
@@ -132,34 +119,11 @@ def update_user_prefs(
         )
 
 
-    class_ids = [c.insight_class_id for c in insight_classes]
-    existing_user_prefs = (
-        db.query(UserInsightPref).filter(
-            UserInsightPref.insight_class_id.in_(class_ids),
-            UserInsightPref.user_id == user.user_id
-        ).all()
-    )
-
-    get_pref_by_class_id = {p.insight_class_id: p for p in existing_user_prefs}
-
-    for u in user_updates.updates:
-        key = u.key
-        insight_class = get_class_by_key[key]
-        pref_exists = get_pref_by_class_id.get(insight_class.insight_class_id)
-
-        if pref_exists:
-            pref_exists.enable = u.enable
-        else:
-            new_user_pref = UserInsightPref(
-                user_id=user.user_id,
-                insight_class_id=insight_class.insight_class_id,
-                enable=u.enable
-            )
-            db.add(new_user_pref)
-            get_pref_by_class_id[insight_class.insight_class_id] = new_user_pref
+    enable_by_class_id = {get_class_by_key[u.key].insight_class_id: u.enable for u in user_updates.updates}
+    upsert_user_prefs(db, user.user_id, enable_by_class_id)
         
     db.commit()
-    logger.info(f"User {user.user_id}'s prefs updated successfully")
+    logger.info("User %s's prefs updated successfully", user.user_id)
     return {
             "status": "PREFS_UPDATED",
             "message": "User insight prefs updated successfully."
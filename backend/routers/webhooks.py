@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from dependencies import get_db
+from models.stripe.webhook_event import WebhookEvent
+from services.stripe_service import verify_signature
+from utils.logger import logger
+from typing import Optional
+import json
+
+router = APIRouter(prefix='/webhooks', tags=['Webhooks'])
+
+
+async def raw_body(request: Request) -> bytes:
+    # the signature covers the exact bytes, read them before any parsing
+    return await request.body()
+
+
+@router.post('/stripe', status_code=status.HTTP_200_OK)
+def stripe_webhook(
+    payload: bytes = Depends(raw_body),
+    stripe_signature: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    # only verify and store here, the webhook worker applies the event. A plain def,
+    # so the insert runs in the threadpool instead of blocking the event loop
+
+    try:
+        verify_signature(payload, stripe_signature)
+    except ValueError as e:
+        logger.warning("Rejected stripe webhook: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "code": "INVALID_SIGNATURE",
+                "message": "Invalid stripe signature"
+            }
+        )
+
+    try:
+        event = json.loads(payload)
+        values = {
+            "stripe_event_id": event["id"],
+            "type": event["type"],
+            "stripe_created_ts": int(event["created"]),
+            "payload": event,
+        }
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Stripe webhook payload is not a valid event")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "code": "INVALID_PAYLOAD",
+                "message": "Invalid stripe event payload"
+            }
+        )
+
+    stmt = insert(WebhookEvent).values(**values).on_conflict_do_nothing(
+        index_elements=[WebhookEvent.stripe_event_id]          # stripe retries deliveries
+    )
+    db.execute(stmt)
+    db.commit()
+
+    logger.info("Stripe event %s received", values['stripe_event_id'])
+    return {"received": True}
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Any, List, Optional
+from datetime import datetime
+
+class ForecastResponse(BaseModel):
+    forecast_id: int
+    generated_on: datetime
+    forecast: Optional[Any] = None      # only returned when requested
+
+class ForecastPage(BaseModel):
+    items: List[ForecastResponse]
+    next_cursor: Optional[str] = None
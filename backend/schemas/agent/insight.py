@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Any, List, Optional
+from datetime import datetime
+
+class InsightResponse(BaseModel):
+    insight_id: int
+    insight_class_id: int
+    generated_on: datetime
+    llm_insights: Any
+    raw_tool_payload: Optional[Any] = None      # only returned when requested
+
+class InsightPage(BaseModel):
+    items: List[InsightResponse]
+    next_cursor: Optional[str] = None
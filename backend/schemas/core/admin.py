@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class AdminInsightPrefUpdate(BaseModel):
+    key: str
+    enable: bool
+    user_ids: Optional[List[int]] = None        # all users if not given
+    overwrite: bool = True                      # if false keep prefs users already set
@@ -1,13 +1,18 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from decimal import Decimal
+from datetime import date
 
 class FXRate(BaseModel):
     rate: Decimal
+    rate_date: Optional[date] = None
+    stale: bool = False
 
 class ConversionResponse(BaseModel):
     rate: Decimal
     amount: Decimal
+    rate_date: Optional[date] = None
+    stale: bool = False
 
 class SupportedCodes(BaseModel):
-    codes: List[List[str]]
\ No newline at end of file
+    codes: List[List[str]]
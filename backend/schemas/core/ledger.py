@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from decimal import Decimal
+from datetime import date
+
+class CurrencyBalance(BaseModel):
+    currency: str
+    income: Decimal
+    expenses: Decimal
+    rate: Decimal               # currency -> the user's preferred currency
+    rate_date: Optional[date] = None
+
+class NetBalanceResponse(BaseModel):
+    currency: str
+    from_date: date
+    to_date: date
+    income: Decimal
+    expenses: Decimal
+    net_balance: Decimal
+    stale: bool = False         # some rate was an older stored one, see FXService.get_quote
+    by_currency: List[CurrencyBalance]
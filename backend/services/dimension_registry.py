@@ -0,0 +1,99 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from database import SessionLocal
+from models.core.currency import Currency
+from models.core.expense_category import ExpenseCategory
+from utils.logger import logger
+from typing import Callable, Dict, Iterable, Optional
+import threading
+
+
+class DimensionRegistry():
+    """
+    In-process two way map of a small append only dimension table, value <-> small int id.
+    An id never changes meaning, so entries are kept for the life of the process.
+    Misses fall back to the table, write paths insert unknown values
+    """
+
+    def __init__(self, id_column, value_column, normalize: Optional[Callable[[str], str]] = None):
+        self._id_column = id_column
+        self._value_column = value_column
+        self._normalize = normalize or (lambda value: value)
+        self._by_value: Dict[str, int] = {}
+        self._by_id: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, rows: Iterable) -> None:
+        with self._lock:
+            for id_, value in rows:
+                self._by_value[value] = id_
+                self._by_id[id_] = value
+
+    def load(self, db: Session) -> None:
+        """
+        Caches the whole table, it is a few hundred rows at most
+        """
+        rows = db.query(self._id_column, self._value_column).all()
+        self._remember(rows)
+        logger.info("Loaded %s %s values", len(rows), self._value_column.class_.__tablename__)
+
+    def refresh(self) -> None:
+        db = SessionLocal()
+        try:
+            self.load(db)
+        finally:
+            db.close()
+
+    def get_id(self, db: Session, value: str) -> Optional[int]:
+        """
+        Id of value, None if it was never stored. Read paths use this, they never insert
+        """
+        value = self._normalize(value)
+        id_ = self._by_value.get(value)
+        if id_ is None:
+            id_ = db.query(self._id_column).filter(self._value_column == value).scalar()
+            if id_ is not None:
+                self._remember([(id_, value)])
+        return id_
+
+    def get_value(self, db: Session, id_: int) -> Optional[str]:
+        value = self._by_id.get(id_)
+        if value is None:
+            value = db.query(self._value_column).filter(self._id_column == id_).scalar()
+            if value is not None:
+                self._remember([(id_, value)])
+        return value
+
+    def ensure_ids(self, values: Iterable[str]) -> Dict[str, int]:
+        """
+        Ids of values, inserting the unknown ones. The insert commits on its own
+        session, so a cached id always refers to a committed row
+
+        Returns:
+        - {normalized value: id}
+        """
+        values = {self._normalize(v) for v in values}
+        missing = [v for v in values if v not in self._by_value]
+        if missing:
+            db = SessionLocal()
+            try:
+                table = self._id_column.class_.__table__
+                db.execute(
+                    insert(table)
+                    .values([{self._value_column.key: v} for v in missing])
+                    .on_conflict_do_nothing(index_elements=[self._value_column.key])
+                )
+                db.commit()
+                self._remember(
+                    db.query(self._id_column, self._value_column).filter(self._value_column.in_(missing)).all()
+                )
+            finally:
+                db.close()
+        return {v: self._by_value[v] for v in values}
+
+    def ensure_id(self, value: str) -> int:
+        return self.ensure_ids([value])[self._normalize(value)]
+
+
+currency_registry = DimensionRegistry(Currency.currency_id, Currency.code, normalize=lambda code: code.strip().upper())
+category_registry = DimensionRegistry(ExpenseCategory.category_id, ExpenseCategory.name, normalize=str.strip)
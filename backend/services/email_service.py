@@ -1,30 +1,32 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-from dotenv import load_dotenv
+from config import settings
+from functools import lru_cache
 from utils.logger import logger
-import os
 
-load_dotenv()
-SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
-SENDGRID_TEMPLATE_ID = os.getenv("SENDGRID_TEMPLATE_ID")
-FROM_EMAIL = os.getenv("FROM_EMAIL")
+
+@lru_cache
+def get_sendgrid_client():
+    # the sendgrid sdk is slow to import and only needed when an email is sent
+    from sendgrid import SendGridAPIClient
+    return SendGridAPIClient(settings.sendgrid_api_key)
+
 
 def send_otp(email: str, name: str, otp: str):
+    from sendgrid.helpers.mail import Mail
+
     message = Mail(
-        from_email=FROM_EMAIL,
+        from_email=settings.from_email,
         to_emails=email,
         subject="Your verification code"
     )
-    message.template_id = SENDGRID_TEMPLATE_ID
+    message.template_id = settings.sendgrid_template_id
     message.dynamic_template_data = {
         "name": name or "User",
         "otp": otp,
     }
 
     try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
-        logger.info(f"OTP sent to email: {email} - status {response.status_code}")
+        response = get_sendgrid_client().send(message)
+        logger.info("OTP sent to email: %s - status %s", email, response.status_code)
     except Exception as e:
-        logger.error(f"Failed to send OTP email: {e}")
+        logger.error("Failed to send OTP email: %s", e)
         raise 
\ No newline at end of file
@@ -0,0 +1,111 @@
+from sqlalchemy.orm import Session
+from models.stripe.subscription import Subscription, SubscriptionStatus
+from services.invalidation_bus import invalidation_bus, InvalidationKind
+from utils.logger import logger
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import threading
+
+NO_SUBSCRIPTION_TTL = timedelta(seconds=60)
+MAX_CACHED_USERS = 100_000
+
+
+@dataclass(frozen=True)
+class Entitlement:
+    status: Optional[SubscriptionStatus]        # None when the user has no active or trial subscription
+    current_period_end: Optional[datetime]
+    trial_end: Optional[datetime]
+    expires_at: datetime                        # entry is valid until this instant
+
+    @property
+    def active(self) -> bool:
+        return self.status is not None
+
+
+class EntitlementCache():
+    """
+    Per-process cache of each user's ACTIVE/TRIAL subscription. Entries expire
+    exactly at the end of the paid or trial period, users without a subscription
+    are re-checked after NO_SUBSCRIPTION_TTL. Stripe webhook processing and
+    the expiry sweeper invalidate the affected users through the invalidation bus
+    """
+
+    def __init__(self, max_size: int = MAX_CACHED_USERS):
+        self._entries: "OrderedDict[int, Entitlement]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+
+    def get(self, user_id: int) -> Optional[Entitlement]:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if now >= entry.expires_at:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry
+
+    def put(self, user_id: int, entry: Entitlement) -> None:
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def load(self, db: Session, user_id: int) -> Entitlement:
+        """
+        Reads the user's subscription through the one active/trial per user
+        index and caches it
+        """
+        now = datetime.now(timezone.utc)
+        subscription = (
+            db.query(Subscription.status, Subscription.current_period_end, Subscription.trial_end)
+            .filter(
+                Subscription.user_id == user_id,
+                Subscription.status.in_([SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIAL])
+            )
+            .first()
+        )
+
+        entry = None
+        if subscription is not None:
+            boundary = subscription.current_period_end
+            if subscription.status == SubscriptionStatus.TRIAL and subscription.trial_end is not None:
+                boundary = subscription.trial_end
+
+            if boundary > now:          # past the boundary the expiry sweeper hasn't run yet
+                entry = Entitlement(
+                    status=subscription.status,
+                    current_period_end=subscription.current_period_end,
+                    trial_end=subscription.trial_end,
+                    expires_at=boundary
+                )
+
+        if entry is None:
+            entry = Entitlement(status=None, current_period_end=None, trial_end=None, expires_at=now + NO_SUBSCRIPTION_TTL)
+
+        self.put(user_id, entry)
+        logger.debug("Loaded entitlement for user %s", user_id)
+        return entry
+
+    def get_or_load(self, db: Session, user_id: int) -> Entitlement:
+        return self.get(user_id) or self.load(db, user_id)
+
+
+entitlement_cache = EntitlementCache()
+invalidation_bus.subscribe(
+    InvalidationKind.ENTITLEMENT,
+    lambda key: entitlement_cache.clear() if key is None else entitlement_cache.invalidate(int(key))
+)
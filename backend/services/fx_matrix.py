@@ -0,0 +1,162 @@
+from datetime import date
+from decimal import Decimal, ROUND_HALF_EVEN
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import mmap
+import os
+import struct
+import threading
+import time
+
+# layout, little endian:
+#   header   magic, currency count, rate date (ordinal), generated at (unix)
+#   codes    count x 8 bytes, ascii, space padded
+#   usd      count x int64, USD -> currency rate scaled by RATE_SCALE (exact, same precision as fx_rates.rate)
+#   matrix   count x count float64, matrix[i][j] = rate from currency i to currency j
+MAGIC = b"CVFXMAT1"
+HEADER = struct.Struct("<8sIqq")
+CODE_WIDTH = 8
+RATE_SCALE = 10 ** 8
+RATE_QUANTUM = Decimal(1).scaleb(-8)
+
+
+class FXMatrixSnapshot():
+    """
+    Read only view of one mapped matrix file. Lookups read straight from the
+    shared mapping, nothing is copied into the worker
+    """
+
+    def __init__(self, mm: mmap.mmap):
+        magic, count, rate_ordinal, generated_at = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError("Not an FX matrix file")
+
+        self._mm = mm
+        self.count = count
+        self.rate_date = date.fromordinal(rate_ordinal)
+        self.generated_at = generated_at
+
+        codes_offset = HEADER.size
+        self._usd_offset = codes_offset + count * CODE_WIDTH
+        self._matrix_offset = self._usd_offset + count * 8
+        if len(mm) < self._matrix_offset + count * count * 8:
+            raise ValueError("Truncated FX matrix file")
+
+        self.index: Dict[str, int] = {
+            mm[codes_offset + i * CODE_WIDTH: codes_offset + (i + 1) * CODE_WIDTH].decode("ascii").strip(): i
+            for i in range(count)
+        }
+
+    def __contains__(self, currency: str) -> bool:
+        return currency in self.index
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        float64 rate, for bulk / approximate work
+        """
+        i, j = self.index[from_currency], self.index[to_currency]
+        return struct.unpack_from("<d", self._mm, self._matrix_offset + (i * self.count + j) * 8)[0]
+
+    def usd_rate(self, currency: str) -> Decimal:
+        scaled = struct.unpack_from("<q", self._mm, self._usd_offset + self.index[currency] * 8)[0]
+        return Decimal(scaled).scaleb(-8)
+
+    def exact_rate(self, from_currency: str, to_currency: str) -> Decimal:
+        """
+        Decimal rate rounded to the precision of fx_rates.rate, used for money
+        """
+        if from_currency == to_currency:
+            return Decimal(1).quantize(RATE_QUANTUM)
+        if from_currency == "USD":
+            return self.usd_rate(to_currency)
+        return (self.usd_rate(to_currency) / self.usd_rate(from_currency)).quantize(RATE_QUANTUM, rounding=ROUND_HALF_EVEN)
+
+
+def write_matrix(path: Path, usd_rates: Dict[str, Decimal], rate_date: date) -> Path:
+    """
+    Writes the matrix for USD -> currency rates next to path and atomically
+    renames it into place, so readers see either the old or the new file
+    """
+    codes = sorted(usd_rates)
+    if "USD" not in usd_rates:
+        raise ValueError("USD rates must include USD")
+    count = len(codes)
+
+    scaled = [int((usd_rates[c] * RATE_SCALE).to_integral_value(rounding=ROUND_HALF_EVEN)) for c in codes]
+    floats = [float(usd_rates[c]) for c in codes]
+
+    body = bytearray(HEADER.pack(MAGIC, count, rate_date.toordinal(), int(time.time())))
+    for code in codes:
+        body += code.encode("ascii").ljust(CODE_WIDTH)[:CODE_WIDTH]
+    body += struct.pack(f"<{count}q", *scaled)
+    for from_rate in floats:
+        body += struct.pack(f"<{count}d", *(to_rate / from_rate for to_rate in floats))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+class FXMatrix():
+    """
+    Maps the matrix file read only and remaps it when the refresh job swaps
+    in a new one. The file is checked at most every check_interval seconds,
+    readers holding the previous snapshot keep a valid mapping
+    """
+
+    def __init__(self, path: Path, check_interval: float = 5.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._snapshot: Optional[FXMatrixSnapshot] = None
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _remap_if_changed(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._snapshot, self._file_id = None, None
+            return
+
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        if file_id == self._file_id:
+            return
+
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._snapshot = FXMatrixSnapshot(mm)          # the previous mapping is released once no reader holds it
+        self._file_id = file_id
+
+    def snapshot(self) -> Optional[FXMatrixSnapshot]:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if now - self._checked_at >= self.check_interval:
+                    try:
+                        self._remap_if_changed()
+                    except (OSError, ValueError):
+                        self._snapshot, self._file_id = None, None
+                    self._checked_at = now
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        """
+        Makes the next lookup re-check the file, e.g. right after the refresh job wrote it
+        """
+        self._checked_at = float("-inf")
+
+    def current(self, rate_date: date) -> Optional[FXMatrixSnapshot]:
+        """
+        The mapped matrix if it holds rates for rate_date
+        """
+        snapshot = self.snapshot()
+        if snapshot is None or snapshot.rate_date != rate_date:
+            return None
+        return snapshot
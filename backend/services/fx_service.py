@@ -1,78 +1,245 @@
-import httpx
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from database import SessionLocal
 from models.core.fx_rate import FXRate
+from dataclasses import dataclass
 from decimal import Decimal
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from config import settings
 from utils.logger import logger
 from utils.helpers import convert_unix_to_date
-from typing import List
-from dotenv import load_dotenv
-import os
+from utils.metrics import registry, Counter, record_outbound
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.invalidation_bus import invalidation_bus, InvalidationKind
+from services.fx_matrix import FXMatrix
+from services.dimension_registry import currency_registry
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+import asyncio
+import time
+
+if TYPE_CHECKING:
+    import httpx
+
+FX_API_BASE_URL = settings.fx_api_base_url
+FX_API_KEY = settings.fx_api_key
+FX_MATRIX_PATH = Path(settings.fx_matrix_path or Path(__file__).resolve().parent.parent / "data" / "fx_matrix.bin")
+FX_STALE_AFTER_SECS = settings.fx_stale_after_secs        # how long a request waits on the API before taking the stored rate
+FX_REFETCH_AFTER = timedelta(hours=1)                      # the API's rate date lags ours around midnight, don't refetch every request
+
+stale_quotes_served = registry.register(Counter(
+    "fx_stale_quotes_total", "FX quotes served from an older stored rate because the API was down or slow"
+))
+
+
+@dataclass(frozen=True)
+class FXQuote:
+    rate: Decimal
+    rate_date: date
+    stale: bool         # true when the API could not confirm the rate in time and an older stored rate is used
+    from_matrix: bool = False       # priced from the shared daily matrix, identified by its generated_at
 
-load_dotenv()
-FX_API_BASE_URL = os.getenv("FX_API_BASE_URL", "https://v6.exchangerate-api.com/v6")
-FX_API_KEY = os.getenv("FX_API_KEY")
 
 class FXService():
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=10.0)
+        self._client: Optional["httpx.AsyncClient"] = None
+        self.matrix = FXMatrix(FX_MATRIX_PATH)
+        self.breaker = CircuitBreaker("exchangerate")
+        self._inflight: Dict[Tuple[str, str], "asyncio.Task"] = {}
+
+    def open(self, client: Optional["httpx.AsyncClient"] = None) -> None:
+        """
+        Creates the http client, called from the app lifespan. A client can be
+        passed in to point the service at a stub
+        """
+        if self._client is not None and client is None:
+            return
+        if client is None:
+            import httpx
+            client = httpx.AsyncClient(timeout=10.0)
+        self._client = client
         logger.info("Connecting to httpx async client")
-    
-    async def get_latest_rate(
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        # jobs and scripts use the service without the app lifespan
+        if self._client is None:
+            self.open()
+        return self._client
+
+    async def _get(self, url: str) -> "httpx.Response":
+        """
+        GET against the ExchangeRate API through the circuit breaker, timed for the metrics endpoint
+
+        Raises:
+        - CircuitOpenError without calling the API while the circuit is open
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("ExchangeRate API circuit is open")
+
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.client.get(url)
+            status = str(response.status_code)
+        except Exception:
+            self.breaker.record_failure()        # transport errors and anything else the client raises
+            raise
+        except BaseException:
+            self.breaker.release_trial()         # cancelled, e.g. at shutdown, the trial slot must not leak
+            raise
+        finally:
+            record_outbound("exchangerate", status, time.perf_counter() - started)
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def _fetch_pair(self, from_currency: str, to_currency: str) -> Tuple[Decimal, date]:
+        """
+        Fetches a pair rate from the API and stores it in fx_rates with its own session,
+        so it can finish after the request that started it
+        """
+
+        url = f"{FX_API_BASE_URL}/{FX_API_KEY}/pair/{from_currency}/{to_currency}"
+
+        response = await self._get(url)
+        response.raise_for_status()
+        data = response.json()
+
+        if data["result"] != "success":
+            error_type = data.get("error-type", "unknown-error")
+            raise ValueError(f"ExchangeRate API error: {error_type}")
+
+        rate_date = convert_unix_to_date(data["time_last_update_unix"])
+        rate = Decimal(str(data["conversion_rate"]))
+
+        await asyncio.to_thread(self._store_rate, from_currency, to_currency, rate, rate_date)
+
+        logger.info("Fetched rate successfully")
+        return rate, rate_date
+
+    def _store_rate(self, from_currency: str, to_currency: str, rate: Decimal, rate_date: date) -> None:
+        # in a worker thread, waiting on a pool connection must not block the event loop
+        currency_ids = currency_registry.ensure_ids([from_currency, to_currency])
+        db = SessionLocal()
+        try:
+            db.add(FXRate(
+                original_currency_id=currency_ids[from_currency],
+                to_currency_id=currency_ids[to_currency],
+                rate=rate,
+                rate_date=rate_date
+            ))
+            db.commit()
+        except IntegrityError:
+            db.rollback()           # another worker stored the day's rate first
+        finally:
+            db.close()
+
+    def _latest_stored(self, db: Session, from_currency: str, to_currency: str):
+        """
+        Latest fx_rates row of the pair, None if it was never stored. Read on a short
+        session of its own against the caller's database, so no connection is held
+        while waiting on the API and the caller's session is left alone
+        """
+        with Session(bind=db.get_bind()) as read_db:
+            from_id = currency_registry.get_id(read_db, from_currency)
+            to_id = currency_registry.get_id(read_db, to_currency)
+            if from_id is None or to_id is None:
+                return None
+            return read_db.query(FXRate.rate, FXRate.rate_date, FXRate.created_at).filter(
+                FXRate.original_currency_id == from_id,
+                FXRate.to_currency_id == to_id
+            ).order_by(FXRate.rate_date.desc()).first()
+
+    def _refresh_pair(self, from_currency: str, to_currency: str) -> "asyncio.Task":
+        # one upstream fetch per pair at a time, concurrent requests share it
+        key = (from_currency, to_currency)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_pair(from_currency, to_currency))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._refresh_done(key, t))
+        return task
+
+    def _refresh_done(self, key: Tuple[str, str], task: "asyncio.Task") -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background FX refresh of %s-%s failed: %s", key[0], key[1], task.exception())
+
+    async def get_quote(
         self,
         db: Session,
         from_currency: str,
         to_currency: str
-    ) -> Decimal:
+    ) -> FXQuote:
         """
-        Get latest exchange rate for given currency
+        Get latest exchange rate for given currency. When today's rate isn't
+        stored yet and the API is down or slower than FX_STALE_AFTER_SECS, the
+        most recent stored rate is returned flagged as stale, and the fetch
+        carries on in the background
 
         Args:
+        - db: picks the database to read stored rates from, its session is not used. Callers
+        should end their own read first, the API call can take a while
         - from_currency: the base currency to convert from
         - to_currency: the currency to convert to
 
         Returns:
-        - exchange rate value
+        - FXQuote
+
+        Raises:
+        - CircuitOpenError / httpx.HTTPError / ValueError when the API fails and no rate was ever stored for the pair
         """
 
-        # check if exchange rate for the day is already cached
-        exists = db.query(FXRate).filter(
-            FXRate.original_currency == from_currency.upper(),
-            FXRate.to_currency == to_currency.upper(),
-            FXRate.rate_date == date.today()
-        ).first()
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
 
-        if exists:
+        # shared matrix written by the daily refresh job, no db or api round trip
+        matrix = self.matrix.current(date.today())
+        if matrix is not None and from_currency in matrix and to_currency in matrix:
+            return FXQuote(matrix.exact_rate(from_currency, to_currency), matrix.rate_date, False, from_matrix=True)
+
+        # latest stored rate, fresh if it is today's or was fetched recently
+        latest = self._latest_stored(db, from_currency, to_currency)
+        if latest is not None and (
+            latest.rate_date >= date.today()
+            or (latest.created_at is not None and datetime.now(timezone.utc) - latest.created_at < FX_REFETCH_AFTER)
+        ):
             logger.info("FX Rate already exists")
-            return exists.rate
-        
-        url = f"{FX_API_BASE_URL}/{FX_API_KEY}/pair/{from_currency.upper()}/{to_currency.upper()}"
+            return FXQuote(latest.rate, latest.rate_date, False)
 
-        response = await self.client.get(url)
-        response.raise_for_status()
-        data = response.json()
+        task = self._refresh_pair(from_currency, to_currency)
+        if latest is None:
+            rate, rate_date = await asyncio.shield(task)      # nothing to fall back on
+            return FXQuote(rate, rate_date, False)
 
-        if data["result"] != "success":
-            error_type = data.get("error-type", "unknown-error")
-            raise ValueError(f"ExchangeRate API error: {error_type}")
+        try:
+            rate, rate_date = await asyncio.wait_for(asyncio.shield(task), FX_STALE_AFTER_SECS)
+            return FXQuote(rate, rate_date, False)
+        except Exception as e:
+            logger.warning("Serving stale %s-%s rate from %s: %s", from_currency, to_currency, latest.rate_date, repr(e))
+            stale_quotes_served.inc()
+            return FXQuote(latest.rate, latest.rate_date, True)
 
-        rate_date = convert_unix_to_date(data["time_last_update_unix"])
-        rate = Decimal(str(data["conversion_rate"]))
+    async def get_latest_rate(
+        self,
+        db: Session,
+        from_currency: str,
+        to_currency: str
+    ) -> Decimal:
+        """
+        Rate of get_quote, without the staleness details
+        """
+        return (await self.get_quote(db, from_currency, to_currency)).rate
 
-        new_rate = FXRate(
-            original_currency=from_currency.upper(),
-            to_currency=to_currency.upper(),
-            rate=rate,
-            rate_date=rate_date
-        )
-        db.add(new_rate)
-        db.commit()
-        db.refresh(new_rate)
 
-        logger.info("Fetched rate successfully")
-        return rate
-    
-    
     async def convert(
         self,
         db: Session,
@@ -89,16 +256,18 @@ class FXService():
         - amount: amount to convert
 
         Return:
-        - {'rate': decimal, 'amount': decimal}
+        - {'rate': decimal, 'amount': decimal, 'rate_date': date, 'stale': bool}
         """
 
-        rate = await self.get_latest_rate(db, from_currency, to_currency)
-        converted_amount = amount*rate
+        quote = await self.get_quote(db, from_currency, to_currency)
+        converted_amount = amount*quote.rate
 
         logger.info("Fetched rate and converted successfully")
         return {
-            'rate': rate,
-            'amount': converted_amount
+            'rate': quote.rate,
+            'amount': converted_amount,
+            'rate_date': quote.rate_date,
+            'stale': quote.stale
         }
 
 
@@ -113,7 +282,7 @@ class FXService():
         """
 
         url = f"{FX_API_BASE_URL}/{FX_API_KEY}/codes"
-        response = await self.client.get(url)
+        response = await self._get(url)
         response.raise_for_status()
 
         data = response.json()
@@ -125,4 +294,26 @@ class FXService():
         return data["supported_codes"]
 
 
-fx_service = FXService()
\ No newline at end of file
+    async def get_usd_rates(self) -> Tuple[date, Dict[str, Decimal]]:
+        """
+        Latest USD -> currency rates for all supported currencies, in one call
+
+        Returns:
+        - (rate date, {currency: rate})
+        """
+
+        url = f"{FX_API_BASE_URL}/{FX_API_KEY}/latest/USD"
+        response = await self._get(url)
+        response.raise_for_status()
+
+        data = response.json()
+        if data["result"] != "success":
+            error_type = data.get("error-type", "unknown-error")
+            raise ValueError(f"ExchangeRate API error: {error_type}")
+
+        rate_date = convert_unix_to_date(data["time_last_update_unix"])
+        return rate_date, {code: Decimal(str(rate)) for code, rate in data["conversion_rates"].items()}
+
+
+fx_service = FXService()
+invalidation_bus.subscribe(InvalidationKind.FX_RATES, lambda key: fx_service.matrix.invalidate())
@@ -0,0 +1,95 @@
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.core.insight_class import InsightClass
+from services.invalidation_bus import invalidation_bus, InvalidationKind
+from utils.logger import logger
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+import hashlib
+import threading
+
+
+@dataclass(frozen=True)
+class InsightClassEntry:
+    insight_class_id: int
+    key: str
+    name: str
+    is_builtin: bool
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    classes: Tuple[InsightClassEntry, ...]
+    by_key: Mapping[str, InsightClassEntry]
+    by_id: Mapping[int, InsightClassEntry]
+    fingerprint: str            # same for the same table content, in every process
+
+
+class InsightClassRegistry():
+    """
+    Immutable in-process copy of the insight_classes table. The table is tiny
+    and almost static, so it is loaded at startup and swapped as a whole on refresh
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> None:
+        """
+        Replaces the registry content with the current table rows
+        """
+        rows = db.query(InsightClass).order_by(InsightClass.insight_class_id).all()
+        classes = tuple(
+            InsightClassEntry(
+                insight_class_id=r.insight_class_id,
+                key=r.key,
+                name=r.name,
+                is_builtin=r.is_builtin
+            )
+            for r in rows
+        )
+
+        self._snapshot = _Snapshot(
+            classes=classes,
+            by_key=MappingProxyType({c.key: c for c in classes}),
+            by_id=MappingProxyType({c.insight_class_id: c for c in classes}),
+            fingerprint=hashlib.blake2b(repr(classes).encode(), digest_size=4).hexdigest()
+        )
+        logger.info("Loaded %s insight classes into the registry", len(classes))
+
+    def refresh(self) -> None:
+        """
+        Reloads the registry with its own session. After insight_classes changes
+        publish InvalidationKind.INSIGHT_CLASSES instead, so every worker reloads
+        """
+        with self._lock:
+            db = SessionLocal()
+            try:
+                self.load(db)
+            finally:
+                db.close()
+
+    def _current(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.refresh()
+            snapshot = self._snapshot
+        return snapshot
+
+    def all(self) -> Tuple[InsightClassEntry, ...]:
+        return self._current().classes
+
+    def get_by_key(self, key: str) -> Optional[InsightClassEntry]:
+        return self._current().by_key.get(key)
+
+    def get_by_id(self, insight_class_id: int) -> Optional[InsightClassEntry]:
+        return self._current().by_id.get(insight_class_id)
+
+    def fingerprint(self) -> str:
+        return self._current().fingerprint
+
+
+insight_class_registry = InsightClassRegistry()
+invalidation_bus.subscribe(InvalidationKind.INSIGHT_CLASSES, lambda key: insight_class_registry.refresh())
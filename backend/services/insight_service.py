@@ -0,0 +1,294 @@
+from sqlalchemy.orm import Session, Query
+from sqlalchemy import and_, func, true, select, literal, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from models.core.user import User
+from models.core.user_insight_pref import UserInsightPref
+from models.core.insight_class import InsightClass
+from models.agent.insight import Insight
+from utils.logger import logger
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+import hashlib
+import importlib
+import json
+import time
+
+
+@dataclass(frozen=True)
+class InsightTask:
+    """
+    Everything a tool needs to build the raw payload of one insight.
+    Kept small and picklable since it is shipped to pool workers.
+    """
+    user_id: int
+    insight_class_id: int
+    key: str
+    country: str
+    city: Optional[str]
+    preferred_currency: str
+    ledger_version: int
+
+
+InsightTool = Callable[[InsightTask], dict]
+InsightLLM = Callable[[InsightTask, dict], dict]
+
+
+class ToolSpec(NamedTuple):
+    fn: InsightTool
+    version: str                    # bump when the tool output changes, invalidates cached payloads
+    max_age_days: Optional[int]     # None if the payload only depends on the user's ledger and settings
+
+
+INSIGHT_TOOLS: Dict[str, ToolSpec] = {}
+
+
+def _pref_join(user_id):
+    # pref row for (user, class), missing rows mean the class is enabled
+    return and_(
+        UserInsightPref.user_id == user_id,
+        UserInsightPref.insight_class_id == InsightClass.insight_class_id
+    )
+
+
+def builtin_prefs_query(db: Session, user_id: int) -> Query:
+    """
+    User pref for all builtin classes, enable is None when the user never touched the class
+    """
+    return (
+        db.query(
+            InsightClass.insight_class_id,
+            InsightClass.key,
+            InsightClass.name,
+            InsightClass.is_builtin,
+            UserInsightPref.enable
+        )
+        .outerjoin(UserInsightPref, _pref_join(user_id))
+        .filter(InsightClass.is_builtin == True)
+        .order_by(InsightClass.insight_class_id)
+    )
+
+
+def upsert_user_prefs(db: Session, user_id: int, enable_by_class_id: Dict[int, bool]) -> None:
+    """
+    Writes all of a user's pref changes with a single INSERT ... ON CONFLICT DO UPDATE.
+    Does not commit
+    """
+    if not enable_by_class_id:
+        return
+
+    stmt = insert(UserInsightPref).values([
+        {"user_id": user_id, "insight_class_id": class_id, "enable": enable}
+        for class_id, enable in enable_by_class_id.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserInsightPref.user_id, UserInsightPref.insight_class_id],
+        set_={"enable": stmt.excluded.enable},
+        where=UserInsightPref.enable.is_distinct_from(stmt.excluded.enable)      # skip no-op row rewrites
+    )
+    db.execute(stmt)
+
+
+def apply_pref_to_users(
+    db: Session,
+    insight_class_id: int,
+    enable: bool,
+    user_ids: Optional[List[int]] = None,
+    overwrite: bool = True
+) -> int:
+    """
+    Sets one class pref for many users in a single INSERT ... SELECT statement,
+    e.g. when rolling out a new builtin class. Does not commit
+
+    Args:
+    - insight_class_id: class to set the pref for
+    - enable: pref value
+    - user_ids: users to update, all users if None
+    - overwrite: if False, users who already have a pref for the class keep it
+
+    Returns:
+    - number of prefs inserted or changed
+    """
+
+    users = select(User.user_id, literal(insight_class_id), literal(enable))
+    if user_ids is not None:
+        users = users.where(User.user_id.in_(user_ids))
+
+    stmt = insert(UserInsightPref).from_select(["user_id", "insight_class_id", "enable"], users)
+    if overwrite:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserInsightPref.user_id, UserInsightPref.insight_class_id],
+            set_={"enable": stmt.excluded.enable},
+            where=UserInsightPref.enable.is_distinct_from(stmt.excluded.enable)
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[UserInsightPref.user_id, UserInsightPref.insight_class_id]
+        )
+
+    return db.execute(stmt).rowcount
+
+
+def enabled_insight_tasks(
+    db: Session,
+    after: Tuple[int, int] = (0, 0),
+    limit: int = 1000
+) -> List[InsightTask]:
+    """
+    Get (user, class) pairs that should get an insight generated, for all
+    verified users in a single query, ordered by (user_id, insight_class_id)
+    for keyset paging. A page may end in the middle of a user's classes
+
+    Args:
+    - after: (user_id, insight_class_id) of the last pair already handled, only later pairs are returned
+    - limit: max number of (user, class) pairs returned
+
+    Returns:
+    - list of InsightTask
+    """
+
+    rows = (
+        db.query(
+            User.user_id,
+            User.country,
+            User.city,
+            User.preferred_currency,
+            User.ledger_version,
+            InsightClass.insight_class_id,
+            InsightClass.key
+        )
+        .select_from(User)
+        .join(InsightClass, true())
+        .outerjoin(UserInsightPref, _pref_join(User.user_id))
+        .filter(
+            User.is_verified == True,
+            tuple_(User.user_id, InsightClass.insight_class_id) > tuple_(*after),
+            InsightClass.is_builtin == True,
+            func.coalesce(UserInsightPref.enable, True) == True
+        )
+        .order_by(User.user_id, InsightClass.insight_class_id)
+        .limit(limit)
+        .all()
+    )
+
+    return [
+        InsightTask(
+            user_id=r.user_id,
+            insight_class_id=r.insight_class_id,
+            key=r.key,
+            country=r.country,
+            city=r.city,
+            preferred_currency=r.preferred_currency,
+            ledger_version=r.ledger_version
+        )
+        for r in rows
+    ]
+
+
+def register_tool(key: str, version: str = "1", max_age_days: Optional[int] = None):
+    """
+    Registers the payload tool for an insight class key. Tools run in pool
+    workers, so they must be module level functions
+
+    Args:
+    - key: insight class key
+    - version: tool version, part of the payload hash
+    - max_age_days: how long a payload stays reusable for tools reading time sensitive data
+    """
+    def decorator(fn: InsightTool) -> InsightTool:
+        INSIGHT_TOOLS[key] = ToolSpec(fn, version, max_age_days)
+        return fn
+    return decorator
+
+
+def default_tool(task: InsightTask) -> dict:
+    """
+    Fallback payload for classes without a dedicated tool, gives the LLM
+    the user's location and currency context
+    """
+    return {
+        "insight_class": task.key,
+        "country": task.country,
+        "city": task.city,
+        "currency": task.preferred_currency,
+    }
+
+
+DEFAULT_TOOL = ToolSpec(default_tool, "1", None)
+
+
+def compute_tool_payload(task: InsightTask) -> Optional[dict]:
+    """
+    Runs the tool of the task's class, returns None if the tool failed
+    """
+    tool = INSIGHT_TOOLS.get(task.key, DEFAULT_TOOL).fn
+    try:
+        return tool(task)
+    except Exception as e:
+        logger.error("Insight tool %s failed for user %s: %s", task.key, task.user_id, e)
+        return None
+
+
+def payload_hash(task: InsightTask, today: Optional[date] = None) -> str:
+    """
+    Content hash of everything the tool and LLM output depend on:
+    the class key, the user's ledger version and the tool parameters
+    """
+    spec = INSIGHT_TOOLS.get(task.key, DEFAULT_TOOL)
+    params = {
+        "country": task.country,
+        "city": task.city,
+        "currency": task.preferred_currency,
+        "tool_version": spec.version,
+    }
+    if spec.max_age_days:
+        params["period"] = (today or date.today()).toordinal() // spec.max_age_days
+
+    body = json.dumps(
+        {
+            "user_id": task.user_id,
+            "key": task.key,
+            "ledger_version": task.ledger_version,
+            "params": params,
+        },
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def existing_payload_hashes(db: Session, hashes: List[str]) -> Set[str]:
+    """
+    Returns the given hashes that already have a generated insight
+    """
+    if not hashes:
+        return set()
+
+    rows = db.query(Insight.payload_hash).filter(Insight.payload_hash.in_(hashes)).distinct().all()
+    return {r.payload_hash for r in rows}
+
+
+def make_stub_llm(latency: float = 0.0) -> InsightLLM:
+    """
+    LLM stand-in for offline runs and benchmarks, sleeps for latency
+    seconds to mimic a remote call and echoes the payload back
+    """
+    def stub_llm(task: InsightTask, payload: dict) -> dict:
+        if latency:
+            time.sleep(latency)
+        return {
+            "stub": True,
+            "summary": f"{task.key} insight for user {task.user_id}",
+            "payload_keys": sorted(payload.keys()),
+        }
+    return stub_llm
+
+
+def load_llm(path: str) -> InsightLLM:
+    """
+    Loads an LLM callable from a "module:attribute" path
+    """
+    module_name, _, attr = path.partition(":")
+    if not attr:
+        raise ValueError("LLM path must look like 'module:attribute'")
+    return getattr(importlib.import_module(module_name), attr)
@@ -0,0 +1,178 @@
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from database import engine
+from utils.logger import logger
+from utils.metrics import registry, Counter
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+import enum
+import json
+import os
+import select as select_module
+import socket
+import threading
+
+CHANNEL = "cache_invalidation"
+PENDING = "pending_invalidations"           # session.info key of the messages waiting for the commit
+POLL_SECS = 1.0
+RECONNECT_SECS = 1.0
+
+invalidations_applied = registry.register(Counter(
+    "cache_invalidations_total", "Cache invalidation messages applied by this process", ["kind", "source"]
+))
+
+
+class InvalidationKind(str, enum.Enum):
+    # USER and USER_PREFS are reserved for per-user caches of the users / user_insight_prefs
+    # rows. Nothing caches those yet, so nothing publishes them, publish once a subscriber exists
+    USER = "USER"
+    USER_PREFS = "USER_PREFS"
+    ENTITLEMENT = "ENTITLEMENT"
+    INSIGHT_CLASSES = "INSIGHT_CLASSES"
+    FX_RATES = "FX_RATES"
+    USER_WRITE = "USER_WRITE"           # the user committed a write, their reads skip the replica for a while
+
+
+Handler = Callable[[Optional[str]], None]          # gets the key, None means every entry of the kind
+
+
+class InvalidationBus():
+    """
+    Keeps the in-process caches of all workers coherent through Postgres
+    LISTEN/NOTIFY. Writers publish on their session, the NOTIFY is part of
+    their transaction, so other processes only hear about committed changes.
+    Each process listens on one dedicated connection outside the pool and
+    runs the handlers subscribed for the message kind. Messages sent while
+    the listener was disconnected are lost, so every cache is dropped on reconnect
+    """
+
+    def __init__(self, engine: Engine, channel: str = CHANNEL):
+        self.engine = engine
+        self.channel = channel
+        self._handlers: Dict[InvalidationKind, List[Handler]] = defaultdict(list)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def origin(self) -> str:
+        # per process, so a forked worker doesn't skip its parent's messages
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def subscribe(self, kind: InvalidationKind, handler: Handler) -> None:
+        self._handlers[kind].append(handler)
+
+    def publish(self, db: Session, kind: InvalidationKind, key: Optional[object] = None) -> None:
+        """
+        Queues an invalidation on the session's current transaction. Other
+        processes receive it when the transaction commits, this process applies
+        it right after the commit. Nothing is sent if the transaction rolls back
+
+        Args:
+        - kind: what changed
+        - key: e.g. the user id, None invalidates every entry of the kind
+        """
+        key = None if key is None else str(key)
+        db.info.setdefault(PENDING, []).append((kind, key))
+
+        if db.get_bind().dialect.name == "postgresql":
+            payload = json.dumps({"kind": kind.value, "key": key, "origin": self.origin})
+            db.execute(select(func.pg_notify(self.channel, payload)))
+
+    def dispatch(self, kind: InvalidationKind, key: Optional[str], source: str = "local") -> None:
+        for handler in self._handlers.get(kind, ()):
+            try:
+                handler(key)
+            except Exception as e:
+                logger.error("Invalidation handler for %s failed: %s", kind.value, e)
+        invalidations_applied.inc(kind=kind.value, source=source)
+
+    def dispatch_all(self) -> None:
+        for kind in list(self._handlers):
+            self.dispatch(kind, None, source="reconnect")
+
+    def _receive(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            kind = InvalidationKind(message["kind"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed invalidation message: %s", payload)
+            return
+
+        if message.get("origin") == self.origin:
+            return          # already applied after our own commit
+        self.dispatch(kind, message.get("key"), source="remote")
+
+    def start(self) -> None:
+        """
+        Starts the listener thread, call once per worker at startup
+        """
+        if self.engine.dialect.name != "postgresql":
+            logger.info("Invalidation bus needs postgres, caches are only invalidated in-process")
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = POLL_SECS + 1) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _connect(self):
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        conn = self.engine.dialect.loaded_dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return conn
+
+    def _listen(self) -> None:
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                conn = self._connect()
+            except Exception as e:
+                logger.warning("Invalidation bus can't connect: %s", e)
+                self._stop.wait(RECONNECT_SECS)
+                continue
+
+            if connected_before:
+                self.dispatch_all()
+            connected_before = True
+            logger.info("Invalidation bus listening on %s", self.channel)
+
+            try:
+                while not self._stop.is_set():
+                    readable, _, _ = select_module.select([conn], [], [], POLL_SECS)
+                    if not readable:
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._receive(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning("Invalidation bus connection lost: %s", e)
+            finally:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+invalidation_bus = InvalidationBus(engine)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    for kind, key in session.info.pop(PENDING, ()):
+        invalidation_bus.dispatch(kind, key)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_uncommitted(session: Session, transaction) -> None:
+    if transaction.parent is None:          # rolled back or closed without a commit
+        session.info.pop(PENDING, None)
@@ -0,0 +1,210 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, union_all, literal, func
+from models.core.user import User
+from models.core.expense import Expense
+from models.core.income import Income
+from schemas.core.ledger import CurrencyBalance, NetBalanceResponse
+from services.fx_service import FXService
+from services.dimension_registry import currency_registry
+from services.invalidation_bus import invalidation_bus, InvalidationKind
+from utils.logger import logger
+from utils.metrics import registry, Counter
+from utils.http_cache import make_etag
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, NamedTuple, Optional, Tuple
+import asyncio
+import threading
+
+NET_BALANCE_TTL = timedelta(hours=1)        # rates move daily, the ledger part is covered by ledger_version
+MAX_CACHED_BALANCES = 50_000
+CENT = Decimal("0.01")
+
+net_balance_cache_lookups = registry.register(Counter(
+    "net_balance_cache_lookups_total", "Net balance cache lookups", ["result"]
+))
+
+class NetBalanceKey(NamedTuple):
+    user_id: int
+    from_date: date
+    to_date: date
+    ledger_version: int
+    settings_version: int           # covers the preferred currency
+    fx_matrix: Optional[int]        # generated_at of today's matrix, the same in every process mapping the file
+
+    @property
+    def etag(self) -> str:
+        return make_etag("net-balance", *self)
+
+
+@dataclass(frozen=True)
+class _CachedBalance:
+    response: NetBalanceResponse
+    validatable: bool
+    expires_at: datetime
+
+
+class NetBalanceCache():
+    """
+    Per-process LRU of computed net balances. A ledger write bumps the user's
+    ledger_version, so entries of older versions are never hit again and age out.
+    Entries also expire after NET_BALANCE_TTL and on FX rate invalidations
+    """
+
+    def __init__(self, max_size: int = MAX_CACHED_BALANCES):
+        self._entries: "OrderedDict[NetBalanceKey, _CachedBalance]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+
+    def get(self, key: NetBalanceKey) -> Optional[Tuple[NetBalanceResponse, bool]]:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if now >= entry.expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry.response, entry.validatable
+
+    def put(self, key: NetBalanceKey, response: NetBalanceResponse, validatable: bool) -> None:
+        with self._lock:
+            self._entries[key] = _CachedBalance(response, validatable, datetime.now(timezone.utc) + NET_BALANCE_TTL)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def currency_totals(db: Session, user_id: int, from_date: date, to_date: date) -> Dict[int, Dict[str, Decimal]]:
+    """
+    Income and expense totals per currency over [from_date, to_date], summed in
+    one round trip on the (user_id, date) indexes of the ledger partitions
+
+    Returns:
+    - {currency_id: {"income": total, "expenses": total}}
+    """
+    def per_currency(model, kind: str):
+        return (
+            select(literal(kind).label("kind"), model.currency_id, func.sum(model.original_amount).label("total"))
+            .where(model.user_id == user_id, model.date >= from_date, model.date <= to_date)
+            .group_by(model.currency_id)
+        )
+
+    totals: Dict[int, Dict[str, Decimal]] = {}
+    for kind, currency_id, total in db.execute(union_all(per_currency(Income, "income"), per_currency(Expense, "expenses"))):
+        totals.setdefault(currency_id, {"income": Decimal(0), "expenses": Decimal(0)})[kind] = Decimal(total)
+    return totals
+
+
+async def compute_net_balance(
+    db: Session,
+    fx_service: FXService,
+    user: User,
+    from_date: date,
+    to_date: date
+) -> Tuple[NetBalanceResponse, bool]:
+    """
+    Income minus expenses over the window in the user's preferred currency. Each
+    currency total is converted with a single rate, never row by row
+
+    Returns:
+    - (balance, whether every foreign currency was priced from the daily matrix)
+
+    Raises:
+    - CircuitOpenError / httpx.HTTPError / ValueError from FXService when a rate can't be had
+    """
+    to_currency = user.preferred_currency.strip().upper()
+    # the aggregate can scan a large window, keep it off the event loop
+    totals = await asyncio.to_thread(currency_totals, db, user.user_id, from_date, to_date)
+    codes = {currency_id: currency_registry.get_value(db, currency_id) for currency_id in totals}
+    # done reading, hand the connection back before waiting on the API. Close, not rollback,
+    # so the loaded user stays readable without a reload
+    db.close()
+
+    # one quote per currency, fetched together so slow pairs wait on the API at the same time
+    foreign = sorted({code for code in codes.values() if code != to_currency})
+    quotes = dict(zip(foreign, await asyncio.gather(*(fx_service.get_quote(db, code, to_currency) for code in foreign))))
+
+    by_currency = []
+    income = expenses = Decimal(0)
+    for currency_id, amounts in totals.items():
+        code = codes[currency_id]
+        quote = quotes.get(code)
+        rate, rate_date = (quote.rate, quote.rate_date) if quote is not None else (Decimal(1), None)
+
+        income += amounts["income"] * rate
+        expenses += amounts["expenses"] * rate
+        by_currency.append(CurrencyBalance(
+            currency=code,
+            income=amounts["income"],
+            expenses=amounts["expenses"],
+            rate=rate,
+            rate_date=rate_date
+        ))
+
+    income, expenses = income.quantize(CENT), expenses.quantize(CENT)
+    response = NetBalanceResponse(
+        currency=to_currency,
+        from_date=from_date,
+        to_date=to_date,
+        income=income,
+        expenses=expenses,
+        net_balance=income - expenses,
+        stale=any(q.stale for q in quotes.values()),
+        by_currency=sorted(by_currency, key=lambda b: b.currency)
+    )
+    return response, all(q.from_matrix for q in quotes.values())
+
+
+def net_balance_key(fx_service: FXService, user: User, from_date: date, to_date: date) -> NetBalanceKey:
+    """
+    Cache key and ETag source of a net balance, from values already in memory. The
+    versions are read with the user before the sums, so a write racing the request
+    can only cache newer totals under the older key. The rates are only pinned down
+    by the matrix, a balance priced from fx_rates rows is never validated with it
+    """
+    matrix = fx_service.matrix.current(date.today())
+    return NetBalanceKey(
+        user.user_id, from_date, to_date, user.ledger_version, user.settings_version,
+        matrix.generated_at if matrix is not None else None
+    )
+
+
+async def get_net_balance(
+    db: Session,
+    fx_service: FXService,
+    user: User,
+    key: NetBalanceKey
+) -> Tuple[NetBalanceResponse, Optional[str]]:
+    """
+    Cached compute_net_balance
+
+    Returns:
+    - (balance, its ETag, None unless all of its rates came from the daily matrix)
+    """
+    cached = net_balance_cache.get(key)
+    if cached is not None:
+        net_balance_cache_lookups.inc(result="hit")
+        response, validatable = cached
+    else:
+        net_balance_cache_lookups.inc(result="miss")
+        response, validatable = await compute_net_balance(db, fx_service, user, key.from_date, key.to_date)
+        if not response.stale:         # retried with fresh rates on the next request
+            net_balance_cache.put(key, response, validatable)
+        else:
+            logger.info("Not caching net balance of user %s, it used stale rates", user.user_id)
+
+    # with no matrix in the key only a balance without foreign currencies is pinned down by it
+    foreign = any(b.currency != response.currency for b in response.by_currency)
+    return response, key.etag if validatable and (key.fx_matrix is not None or not foreign) else None
+
+
+net_balance_cache = NetBalanceCache()
+invalidation_bus.subscribe(InvalidationKind.FX_RATES, lambda key: net_balance_cache.clear())
@@ -0,0 +1,141 @@
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+import fastapi.routing
+import os
+import sys
+import threading
+import time
+
+MAX_PROFILE_SECONDS = 60
+MIN_INTERVAL_MS = 1
+UNTAGGED = "[untagged]"
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+_FASTAPI_ROUTING_FILE = fastapi.routing.__file__
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(str(BASE_DIR)):
+        return os.path.relpath(filename, BASE_DIR)
+    marker = "site-packages" + os.sep
+    index = filename.rfind(marker)
+    return filename[index + len(marker):] if index != -1 else filename
+
+
+class SamplingProfiler():
+    """
+    Wall clock sampling profiler for the current worker process.
+    A background loop snapshots every thread's stack with sys._current_frames()
+    and tags each stack with the route it is serving, found either from the
+    endpoint function on the stack (sync endpoints run in threadpool threads)
+    or from FastAPI's request handler frame on the event loop thread, which also
+    covers dependency resolution and response serialization.
+
+    Only one profile runs at a time per process, and only the worker that
+    received the admin request is profiled
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._labels: Dict[CodeType, str] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _route_from_handler(self, frame: FrameType) -> Optional[str]:
+        try:
+            request = frame.f_locals.get("request")
+            route = request.scope.get("route") if request is not None else None
+        except Exception:
+            return None
+        return f"{request.method} {route.path}" if route is not None else None
+
+    def _sample_stack(self, frame: FrameType, endpoints: Dict[CodeType, str]) -> Tuple[str, Tuple[str, ...]]:
+        stack = []
+        tag = None
+        while frame is not None:
+            code = frame.f_code
+            stack.append(self._label(code))
+            if tag is None:
+                tag = endpoints.get(code)
+                if tag is None and code.co_name == "app" and code.co_filename == _FASTAPI_ROUTING_FILE:
+                    tag = self._route_from_handler(frame)
+            frame = frame.f_back
+        stack.reverse()
+        return tag or UNTAGGED, tuple(stack)
+
+    def profile(
+        self,
+        routes: Iterable,
+        seconds: float,
+        interval: float,
+        include_untagged: bool = False
+    ) -> Optional[Tuple[Counter, int]]:
+        """
+        Samples all threads for the given duration. Blocks the calling thread
+
+        Args:
+        - routes: app routes, used to tag stacks by route
+        - seconds: profile duration
+        - interval: seconds between samples
+        - include_untagged: keep stacks that are not serving a route (idle pools, background jobs)
+
+        Returns:
+        - (counter of (route, stack) samples, number of sampling rounds), None if a profile is already running
+        """
+
+        if not self._lock.acquire(blocking=False):
+            return None
+
+        try:
+            endpoints = {}
+            for route in routes:
+                endpoint = getattr(route, "endpoint", None)
+                code = getattr(endpoint, "__code__", None)
+                if code is not None:
+                    methods = ",".join(sorted(getattr(route, "methods", None) or []))
+                    endpoints[code] = f"{methods} {route.path}".strip()
+
+            own_thread = threading.get_ident()
+            samples: Counter = Counter()
+            rounds = 0
+            deadline = time.perf_counter() + seconds
+
+            while time.perf_counter() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    tag, stack = self._sample_stack(frame, endpoints)
+                    if tag == UNTAGGED and not include_untagged:
+                        continue
+                    samples[(tag, stack)] += 1
+                rounds += 1
+                time.sleep(interval)
+
+            return samples, rounds
+        finally:
+            self._lock.release()
+
+
+def render_collapsed(samples: Counter) -> str:
+    """
+    Renders samples in the collapsed stack format ("route;frame;frame count" per line)
+    read by flamegraph.pl, speedscope and inferno
+    """
+    lines: List[str] = []
+    for (tag, stack), count in samples.most_common():
+        frames = ";".join(f.replace(";", ":") for f in (tag,) + stack)
+        lines.append(f"{frames} {count}")
+    return "\n".join(lines) + "\n"
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,104 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from database import engine, replica_engine, SessionLocal, ReadSessionLocal
+from config import settings
+from services.invalidation_bus import invalidation_bus, InvalidationKind
+from utils.metrics import registry, Counter
+from typing import Dict, Optional
+import threading
+import time
+
+REPLICA_ENABLED = replica_engine is not engine
+WROTE = "wrote"                     # session.info keys
+WRITER_USER_ID = "writer_user_id"
+MAX_TRACKED_WRITERS = 100_000
+
+read_sessions = registry.register(Counter(
+    "db_read_sessions_total", "Sessions opened for read only routes, by database", ["target"]
+))
+
+
+class RecentWriters():
+    """
+    Users who committed a write in the last window seconds. Their reads go to
+    the primary, so they see their own writes despite replication lag. Writes
+    handled by other workers arrive through the invalidation bus
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= MAX_TRACKED_WRITERS:
+                self._until = {k: v for k, v in self._until.items() if v > now}
+            self._until[user_id] = now + self.window
+
+    def pinned(self, user_id: int) -> bool:
+        until = self._until.get(user_id)
+        if until is None:
+            return False
+        if time.monotonic() >= until:
+            with self._lock:
+                self._until.pop(user_id, None)
+            return False
+        return True
+
+
+recent_writers = RecentWriters(settings.read_your_writes_secs)
+
+
+def _on_user_write(key: Optional[str]) -> None:
+    if key is not None:         # None comes from a bus reconnect, the missed writers are unknown
+        recent_writers.mark(int(key))
+
+
+invalidation_bus.subscribe(InvalidationKind.USER_WRITE, _on_user_write)
+
+
+def read_session(user_id: Optional[int] = None) -> Session:
+    """
+    Session for reads that may lag behind the primary. On the primary when no
+    replica is configured or the user wrote recently
+    """
+    if REPLICA_ENABLED and not (user_id is not None and recent_writers.pinned(user_id)):
+        read_sessions.inc(target="replica")
+        return ReadSessionLocal()
+    read_sessions.inc(target="primary")
+    return SessionLocal()
+
+
+def bind_writer(db: Session, user_id: int) -> None:
+    """
+    Tags a primary session with the acting user, so its write commits pin the user to the primary
+    """
+    db.info[WRITER_USER_ID] = user_id
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_flush(session: Session, flush_context) -> None:
+    session.info[WROTE] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_dml(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[WROTE] = True
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _pin_writer(session: Session) -> None:
+    # runs before the commit flushes, so pending ORM changes count as writes too
+    user_id = session.info.get(WRITER_USER_ID)
+    wrote = session.info.pop(WROTE, False) or session.new or session.dirty or session.deleted
+    if wrote and user_id is not None and REPLICA_ENABLED:
+        invalidation_bus.publish(session, InvalidationKind.USER_WRITE, user_id)
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _reset_writes(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(WROTE, None)
@@ -0,0 +1,221 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert
+from models.stripe.billing_customer import BillingCustomer
+from models.stripe.subscription import Subscription, SubscriptionStatus
+from utils.helpers import convert_unix_to_datetime
+from utils.logger import logger
+from config import settings
+from typing import Optional
+import hashlib
+import hmac
+import time
+
+SIGNATURE_TOLERANCE_SECS = 300
+
+STRIPE_STATUS_MAP = {
+    "active": SubscriptionStatus.ACTIVE,
+    "past_due": SubscriptionStatus.ACTIVE,         # still entitled while stripe retries the payment
+    "trialing": SubscriptionStatus.TRIAL,
+    "canceled": SubscriptionStatus.CANCELLED,
+    "incomplete": SubscriptionStatus.EXPIRED,
+    "incomplete_expired": SubscriptionStatus.EXPIRED,
+    "unpaid": SubscriptionStatus.EXPIRED,
+    "paused": SubscriptionStatus.EXPIRED,
+}
+ENTITLED_STATUSES = (SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIAL)      # at most one per user, see uq_subscriptions_one_active_or_trial_per_user
+
+
+def _compute_signature(payload: bytes, timestamp: int, secret: str) -> str:
+    signed = f"{timestamp}.".encode("utf-8") + payload
+    return hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+
+
+def verify_signature(
+    payload: bytes,
+    signature_header: Optional[str],
+    secret: Optional[str] = None,
+    tolerance: int = SIGNATURE_TOLERANCE_SECS
+) -> None:
+    """
+    Verifies a Stripe-Signature header ("t=<unix>,v1=<hex>,...") against the raw body
+
+    Raises:
+    - ValueError if the header is missing, malformed, stale or does not match
+    """
+
+    secret = secret or settings.stripe_webhook_secret
+    if not secret:
+        raise ValueError("Stripe webhook secret is not configured")
+    if not signature_header:
+        raise ValueError("Missing signature header")
+
+    timestamp = None
+    signatures = []
+    for item in signature_header.split(","):
+        name, _, value = item.strip().partition("=")
+        if name == "t":
+            timestamp = value
+        elif name == "v1":
+            signatures.append(value)
+
+    if timestamp is None or not timestamp.isdigit() or not signatures:
+        raise ValueError("Malformed signature header")
+
+    expected = _compute_signature(payload, int(timestamp), secret)
+    if not any(hmac.compare_digest(expected, s) for s in signatures):
+        raise ValueError("Signature does not match payload")
+
+    if abs(time.time() - int(timestamp)) > tolerance:
+        raise ValueError("Signature timestamp outside tolerance")
+
+
+def sign_payload(payload: bytes, secret: Optional[str] = None, timestamp: Optional[int] = None) -> str:
+    """
+    Builds a Stripe-Signature header for a payload, for sending local test events
+    """
+    secret = secret or settings.stripe_webhook_secret
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    return f"t={timestamp},v1={_compute_signature(payload, timestamp, secret)}"
+
+
+def _metadata_user_id(obj: dict) -> Optional[int]:
+    user_id = (obj.get("metadata") or {}).get("user_id")
+    return int(user_id) if user_id is not None else None
+
+
+def _upsert_billing_customer(db: Session, stripe_customer_id: str, user_id: int) -> int:
+    stmt = insert(BillingCustomer).values(stripe_customer_id=stripe_customer_id, user_id=user_id)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BillingCustomer.stripe_customer_id],
+        set_={"user_id": stmt.excluded.user_id, "updated_at": func.now()}
+    ).returning(BillingCustomer.id)
+    return db.execute(stmt).scalar_one()
+
+
+def apply_customer_event(db: Session, customer: dict) -> None:
+    user_id = _metadata_user_id(customer)
+    if user_id is None:
+        logger.warning("Stripe customer %s has no user_id metadata, skipping", customer['id'])
+        return
+    _upsert_billing_customer(db, customer["id"], user_id)
+
+
+def _claim_entitled_slot(db: Session, user_id: int, stripe_subscription_id: str, event_ts: int) -> bool:
+    """
+    Makes room for stripe_subscription_id as the user's one active/trial subscription.
+    On a plan change the new subscription's created event can arrive before the old
+    one's deleted, the subscription with the newest event keeps the slot and older
+    ones are cancelled. Their stripe_event_ts is left alone, so their own later events still apply
+
+    Returns:
+    - False when another subscription got a newer event, the incoming state is outdated
+    """
+    own_event_ts = db.query(Subscription.stripe_event_ts).filter(
+        Subscription.stripe_subscription_id == stripe_subscription_id
+    ).scalar()
+    if own_event_ts is not None and own_event_ts > event_ts:
+        return True         # the upsert ignores this event, nothing to make room for
+
+    others = db.query(Subscription).filter(
+        Subscription.user_id == user_id,
+        Subscription.stripe_subscription_id != stripe_subscription_id,
+        Subscription.status.in_(ENTITLED_STATUSES)
+    )
+    if db.query(others.filter(Subscription.stripe_event_ts > event_ts).exists()).scalar():
+        return False
+
+    superseded = others.update(
+        {
+            Subscription.status: SubscriptionStatus.CANCELLED,
+            Subscription.cancelled_at: func.coalesce(Subscription.cancelled_at, func.now()),
+            Subscription.updated_at: func.now()
+        },
+        synchronize_session=False
+    )
+    if superseded:
+        logger.info("Subscription %s superseded %s active subscription(s) of user %s", stripe_subscription_id, superseded, user_id)
+    return True
+
+
+def apply_subscription_event(db: Session, subscription: dict, event_ts: int) -> int:
+    """
+    Upserts the subscription from the event's object. Events older than the last
+    one applied to the subscription are ignored, so concurrent workers can't
+    roll a subscription back to a previous state
+
+    Returns:
+    - id of the subscription's user
+    """
+
+    customer_id = subscription["customer"]
+    billing_customer = db.query(BillingCustomer).filter(
+        BillingCustomer.stripe_customer_id == customer_id
+    ).first()
+
+    if billing_customer is not None:
+        billing_customer_id, user_id = billing_customer.id, billing_customer.user_id
+    else:
+        user_id = _metadata_user_id(subscription)
+        if user_id is None:
+            raise ValueError(f"Unknown stripe customer {customer_id} and no user_id metadata")
+        billing_customer_id = _upsert_billing_customer(db, customer_id, user_id)
+
+    status = STRIPE_STATUS_MAP.get(subscription["status"])
+    if status is None:
+        raise ValueError(f"Unknown stripe subscription status {subscription['status']}")
+
+    if status in ENTITLED_STATUSES and not _claim_entitled_slot(db, user_id, subscription["id"], event_ts):
+        logger.warning("Subscription %s is %s in an outdated event, recording it as cancelled", subscription["id"], status.value)
+        status = SubscriptionStatus.CANCELLED
+
+    item = subscription["items"]["data"][0]
+    # newer stripe api versions moved the billing period to the subscription item
+    period_start = subscription.get("current_period_start") or item.get("current_period_start")
+    period_end = subscription.get("current_period_end") or item.get("current_period_end")
+
+    values = {
+        "user_id": user_id,
+        "billing_customer_id": billing_customer_id,
+        "stripe_subscription_id": subscription["id"],
+        "stripe_price_id": item["price"]["id"],
+        "stripe_item_id": item["id"],
+        "status": status,
+        "current_period_start": convert_unix_to_datetime(period_start),
+        "current_period_end": convert_unix_to_datetime(period_end),
+        "cancelled_at": convert_unix_to_datetime(subscription.get("canceled_at")),
+        "trial_start": convert_unix_to_datetime(subscription.get("trial_start")),
+        "trial_end": convert_unix_to_datetime(subscription.get("trial_end")),
+        "stripe_event_ts": event_ts,
+    }
+
+    stmt = insert(Subscription).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Subscription.stripe_subscription_id],
+        set_={k: stmt.excluded[k] for k in values if k != "stripe_subscription_id"} | {"updated_at": func.now()},
+        where=or_(
+            Subscription.stripe_event_ts.is_(None),
+            Subscription.stripe_event_ts <= stmt.excluded.stripe_event_ts
+        )
+    )
+    db.execute(stmt)
+    return user_id
+
+
+def apply_event(db: Session, event: dict) -> Optional[int]:
+    """
+    Applies a stripe event payload to billing_customers / subscriptions. Does not commit
+
+    Returns:
+    - id of the user whose subscription changed, if any
+    """
+    event_type = event["type"]
+    obj = event["data"]["object"]
+
+    if event_type in ("customer.created", "customer.updated"):
+        apply_customer_event(db, obj)
+    elif event_type.startswith("customer.subscription."):
+        return apply_subscription_event(db, obj, event["created"])
+    else:
+        logger.debug("Ignoring stripe event type %s", event_type)
+    return None
@@ -0,0 +1,68 @@
+from utils.metrics import registry, Gauge
+import threading
+import time
+
+breaker_open = registry.register(Gauge(
+    "circuit_breaker_open", "1 while the circuit breaker of an upstream is open", ["service"]
+))
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream whose circuit is open
+    """
+
+
+class CircuitBreaker():
+    """
+    Consecutive failure breaker. After failure_threshold failures in a row the
+    circuit opens and calls fail fast for reset_timeout seconds, then a single
+    trial call is let through (half open) and its outcome closes or reopens it
+    """
+
+    def __init__(self, service: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.service = service
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+        breaker_open.set(0, service=service)
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial_running = True
+            return True
+
+    def release_trial(self) -> None:
+        """
+        Ends a call whose outcome says nothing about the upstream, e.g. it was cancelled.
+        A half open circuit lets the next call through as the trial
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+        breaker_open.set(0, service=self.service)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+        if self._opened_at is not None:
+            breaker_open.set(1, service=self.service)
@@ -1,7 +1,29 @@
 from datetime import date, datetime, timezone
+import base64
+import binascii
 
 def normalize_string(txt: str) -> str:
     return txt.strip().lower()
 
 def convert_unix_to_date(unix_timestamp: int) -> date:
-    return datetime.fromtimestamp(unix_timestamp, tz=timezone.utc).date()
\ No newline at end of file
+    return datetime.fromtimestamp(unix_timestamp, tz=timezone.utc).date()
+
+def encode_cursor(generated_on: datetime, row_id: int) -> str:
+    raw = f"{generated_on.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Raises ValueError if the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        generated_on, row_id = raw.split("|")
+        return datetime.fromisoformat(generated_on), int(row_id)
+    except (UnicodeError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
+
+def convert_unix_to_datetime(unix_timestamp: int | None) -> datetime | None:
+    if unix_timestamp is None:
+        return None
+    return datetime.fromtimestamp(unix_timestamp, tz=timezone.utc)
@@ -0,0 +1,41 @@
+from fastapi import Request
+from fastapi.responses import Response
+from utils.metrics import registry, Counter
+from typing import Any, Dict
+
+# clients may store user data but have to revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+conditional_requests = registry.register(Counter(
+    "http_conditional_requests_total", "GETs carrying If-None-Match", ["result"]
+))
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Strong ETag from version counters and ids, e.g. make_etag("prefs", user_id, settings_version)
+    """
+    return '"' + "-".join(str(p) for p in parts) + '"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    True when If-None-Match lists etag. If-None-Match compares weakly, so a W/ prefix
+    added by a proxy still matches
+    """
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    matched = "*" in tags or etag in tags
+    conditional_requests.inc(result="not_modified" if matched else "modified")
+    return matched
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -1,30 +1,160 @@
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from multiprocessing.util import Finalize
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
+from config import settings
+from utils.metrics import registry, Counter
+import atexit
+import copy
+import json
 import os
+import queue
+import zlib
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOGGING_DIR = BASE_DIR / "logs"
 LOGGING_DIR.mkdir(exist_ok=True)
 
+NO_REQUEST_ID = "-"
+request_id_var: ContextVar[str] = ContextVar("request_id", default=NO_REQUEST_ID)
+
+dropped_log_records = registry.register(Counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full"
+))
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamps records with the current request id. Runs on the queue handler,
+    so in the thread and context that logged the record
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class InfoSamplingFilter(logging.Filter):
+    """
+    Keeps INFO lines for a fixed share of requests. The decision is made per
+    request id so a kept request keeps all of its lines. Warnings, errors and
+    records logged outside a request are always kept
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.threshold = int(max(0.0, min(rate, 1.0)) * 0xFFFFFFFF)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.INFO or self.threshold >= 0xFFFFFFFF:
+            return True
+        request_id = getattr(record, "request_id", NO_REQUEST_ID)
+        if request_id == NO_REQUEST_ID:
+            return True
+        return zlib.crc32(request_id.encode("utf-8")) <= self.threshold
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", NO_REQUEST_ID),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Never blocks the caller: when the writer thread falls behind, records are dropped and counted
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the default prepare folds the traceback into msg and drops exc_info, keep it
+        # as exc_text instead, the formatters on the writer thread print it from there
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_log_records.inc()
+
+
+if settings.log_format == "json":
+    formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter(
+        "[%(asctime)s] [%(levelname)s] [%(name)s] [%(request_id)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+
 path = LOGGING_DIR / "app.log"
 file_handler = RotatingFileHandler(
     path, maxBytes=1_000_000, backupCount=3, encoding="utf-8"
 )
+file_handler.setFormatter(formatter)
 
+console_handler = logging.StreamHandler()
+console_handler.setFormatter(formatter)
 
-formatter = logging.Formatter(
-    "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
-file_handler.setFormatter(formatter)
 
+queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+queue_handler.addFilter(RequestContextFilter())
+queue_handler.addFilter(InfoSamplingFilter(settings.log_info_sample_rate))
 
 logger = logging.getLogger("app_logger")
-logger.setLevel(logging.INFO)
-logger.addHandler(file_handler)
+logger.setLevel(settings.log_level)
+logger.addHandler(queue_handler)
 
+listener: Optional[QueueListener] = None
 
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
\ No newline at end of file
+
+def start_listener() -> None:
+    """
+    Starts the background thread writing queued records to the file and console handlers
+    """
+    global listener
+    listener = QueueListener(queue_handler.queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+
+
+def stop_listener() -> None:
+    """
+    Flushes the queue and stops the writer thread
+    """
+    if listener is not None and listener._thread is not None:
+        listener.stop()
+
+
+def _restart_in_child() -> None:
+    # forked pool workers don't inherit the writer thread, give them their own queue and listener
+    # multiprocessing exits workers with os._exit, so flush from its finalizers instead of atexit
+    queue_handler.queue = queue.Queue(maxsize=settings.log_queue_size)
+    start_listener()
+    Finalize(None, stop_listener, exitpriority=0)
+
+
+start_listener()
+atexit.register(stop_listener)
+os.register_at_fork(after_in_child=_restart_in_child)
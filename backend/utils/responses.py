@@ -0,0 +1,52 @@
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+import orjson
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)           # exact, money never goes through float
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    Default response class, encodes with orjson. Decimals are written as
+    strings, the same way pydantic serializes them
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def _adapter(type_: Any) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+def model_response(
+    content: Any,
+    type_: Any = None,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    """
+    Fast path for responses built from trusted, already validated models.
+    Serializes straight to JSON bytes in pydantic-core and returns a Response,
+    so FastAPI skips validating the content against response_model again.
+    Keep response_model on the route, it still documents the schema
+
+    Args:
+    - content: a pydantic model, or a value of type_
+    - type_: type of content when it is not a model, e.g. List[InsightClassReponse]
+    """
+    if type_ is None:
+        body = content.__pydantic_serializer__.to_json(content)
+    else:
+        body = _adapter(type_).dump_json(content)
+    return Response(body, status_code=status_code, headers=headers, media_type="application/json")
@@ -1,51 +1,50 @@
-from passlib.context import CryptContext
-from jose import jwt, JWTError
 from datetime import datetime, timedelta, timezone
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-from dotenv import load_dotenv
+from functools import lru_cache
+from config import settings
 from .logger import logger
 import secrets
 import hmac, hashlib
-import os
 
 
-load_dotenv()
-JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINS = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINS", 30))
-OTP_SECRET_KEY = os.getenv("OTP_SECRET_KEY")
-
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache
+def _pwd_context():
+    # passlib and bcrypt are only needed by the auth endpoints, import them on first use
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
     logger.debug("Hashing password")
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 def verify_password(entered_password: str, hashed_password: str) -> bool:
     logger.debug("Verifying password")
-    return pwd_context.verify(entered_password, hashed_password)
+    return _pwd_context().verify(entered_password, hashed_password)
 
 
 def create_access_token(data: dict) -> str:
+    from jose import jwt
     logger.debug("Creating access token")
 
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINS)
+    expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_mins)
     to_encode.update({"exp" : expire})
-    return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=ALGORITHM)
-
-def decode_access_token(token: dict) -> str:
+    return jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.algorithm)
+
+def decode_access_token(token: str) -> dict:
+    """
+    Raises:
+    - ValueError if the token is invalid or expired
+    """
+    from jose import jwt, JWTError
     logger.debug("Decoding access token")
 
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.algorithm])
         logger.debug("Token decoded successfully")
         return payload
     except JWTError as e:
         logger.error("Failed to decode token: %s", str(e))
-        raise JWTError("Invalid token") from e
+        raise ValueError("Invalid token") from e
 
 
 def generate_otp(length: int = 6) -> str:
@@ -55,10 +54,16 @@ def generate_otp(length: int = 6) -> str:
 def hash_otp(otp: str, email: str) -> str:
     logger.debug("Hashing otp")
     msg = f"{email}:{otp}".encode("utf-8")
-    return hmac.new(OTP_SECRET_KEY.encode("utf-8"), msg, hashlib.sha256).hexdigest()
+    return hmac.new(settings.otp_secret_key.encode("utf-8"), msg, hashlib.sha256).hexdigest()
 
 def verify_otp(given_otp: str, email: str, stored_otp_hash: str) -> bool:
     logger.debug("Verifying otp")
     given_otp_hash = hash_otp(given_otp, email)
     return hmac.compare_digest(given_otp_hash, stored_otp_hash)
 
+
+def verify_admin_key(given_key: str | None) -> bool:
+    logger.debug("Verifying admin key")
+    if not settings.admin_api_key or not given_key:         # admin endpoints are closed until a key is configured
+        return False
+    return hmac.compare_digest(given_key.encode("utf-8"), settings.admin_api_key.encode("utf-8"))